@@ -0,0 +1,264 @@
+"""
+Memory and CPU right-sizing benchmark for the worker Lambda
+
+Runs worker.lambda_handler against a local Discord stand-in (an HTTP server
+on localhost) for several SQS record batch sizes, each in a fresh process,
+and measures wall-clock time, CPU time and peak RSS. It then estimates
+duration and cost per campaign for a range of Lambda memory sizes.
+
+Lambda allocates CPU in proportion to memory (1 vCPU at 1769 MB). Whole-CPU
+limits can be measured directly with --cpus; fractional vCPU shares are
+estimated by stretching the measured CPU time and keeping I/O wait as is.
+
+Examples:
+    python scripts/bench_worker.py
+    python scripts/bench_worker.py --batch-sizes 1 10 --campaigns 20 --discord-latency 0.12 --cpus 1
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import resource
+import threading
+import multiprocessing
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# AWS Lambda x86 pricing (us-east-1)
+PRICE_PER_GB_SECOND = 0.0000166667
+PRICE_PER_REQUEST = 0.20 / 1_000_000
+
+# Memory at which Lambda allocates one full vCPU
+MB_PER_VCPU = 1769
+
+# Current WorkerLambdaFunction settings in infrastructure/sqs-worker.yaml
+CURRENT_MEMORY_MB = 256
+CURRENT_TIMEOUT_SECONDS = 30
+
+DEFAULT_MEMORY_SIZES = [128, 256, 512, 1024, 1769, 3008]
+DEFAULT_BATCH_SIZES = [1, 5, 10]
+
+
+class DiscordStandIn(BaseHTTPRequestHandler):
+    """Answers the Discord routes the worker uses, after a fixed latency"""
+
+    latency = 0.1
+    counter = iter(range(900000000000000000, 10 ** 19))
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, data):
+        time.sleep(self.latency)
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Remaining', '1000')
+        self.send_header('X-RateLimit-Reset-After', '1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def do_POST(self):
+        payload = self._read_json() or {}
+        with self.lock:
+            channel_id = str(next(self.counter))
+        self._reply(201, {'id': channel_id, **payload})
+
+    def do_PATCH(self):
+        payload = self._read_json()
+        self._reply(200, {'id': '1', **payload} if isinstance(payload, dict) else None)
+
+    def do_GET(self):
+        self._reply(200, [])
+
+    def do_PUT(self):
+        self._reply(204, None)
+
+
+def start_stand_in(latency):
+    """Start the Discord stand-in on a free localhost port"""
+    DiscordStandIn.latency = latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DiscordStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_campaign_records(campaign_idx, channels):
+    """Build the SQS records /add-campaign queues for one campaign"""
+    campaign_name = f"Bench Campaign {campaign_idx}"
+    base = {
+        'application_id': '200000000000000002',
+        'interaction_token': f"bench-token-{campaign_idx}",
+        'campaign_name': campaign_name,
+        'trace_id': f"bench-{campaign_idx}"
+    }
+    sent = str(int(time.time() * 1000))
+    records = []
+    for idx, channel_config in enumerate(channels, start=1):
+        body = {
+            **base,
+            'task_type': 'create_channel',
+            'guild_id': '100000000000000001',
+            'channel_config': channel_config,
+            'category_id': '300000000000000003',
+            'campaign_role_id': '400000000000000004',
+            'current': idx,
+            'total': len(channels)
+        }
+        records.append({'body': json.dumps(body), 'attributes': {'SentTimestamp': sent}})
+    completion = {
+        **base,
+        'task_type': 'complete',
+        'role_name': f"{campaign_name} Members",
+        'created_channels': [
+            {'name': ch['name'], 'type': 'Text', 'gm_only': ch.get('gm_only', False)}
+            for ch in channels
+        ]
+    }
+    records.append({'body': json.dumps(completion), 'attributes': {'SentTimestamp': sent}})
+    return records
+
+
+def run_config(port, batch_size, campaigns, cpus, results):
+    """
+    Child process: import the worker, replay every campaign's records in
+    batches of batch_size and report timings and peak RSS
+    """
+    if cpus:
+        os.sched_setaffinity(0, set(sorted(os.sched_getaffinity(0))[:cpus]))
+    os.environ.setdefault('DISCORD_BOT_TOKEN', 'bench-bot-token')
+    sys.stdout = open(os.devnull, 'w')
+
+    started_wall, started_cpu = time.perf_counter(), time.process_time()
+    from channelwright import discord_api, worker
+    from channelwright.campaign_config import DEFAULT_CAMPAIGN_CHANNELS
+    discord_api.DISCORD_API_BASE = f"http://127.0.0.1:{port}/api/v10"
+    init = (time.perf_counter() - started_wall, time.process_time() - started_cpu)
+
+    records = []
+    for idx in range(campaigns):
+        records.extend(build_campaign_records(idx, DEFAULT_CAMPAIGN_CHANNELS))
+
+    invocations = []
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        wall, cpu = time.perf_counter(), time.process_time()
+        worker.lambda_handler({'Records': batch}, None)
+        invocations.append((time.perf_counter() - wall, time.process_time() - cpu))
+
+    results.put({
+        'batch_size': batch_size,
+        'records': len(records),
+        'records_per_campaign': len(records) // campaigns,
+        'init_wall': init[0],
+        'init_cpu': init[1],
+        'invocations': invocations,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    })
+
+
+def measure(port, batch_size, campaigns, cpus):
+    """Run one configuration in a fresh process so RSS and imports are cold"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_config, args=(port, batch_size, campaigns, cpus, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def estimate(result, memory_mb, campaigns):
+    """
+    Estimate billed duration and cost per campaign at a memory size
+    CPU time is stretched by the vCPU share; I/O wait is unchanged
+    """
+    vcpu_share = min(1.0, memory_mb / MB_PER_VCPU)
+    durations = []
+    for wall, cpu in result['invocations']:
+        io_wait = max(0.0, wall - cpu)
+        durations.append(io_wait + cpu / vcpu_share)
+
+    billed_seconds = sum(math.ceil(d * 1000) / 1000 for d in durations)
+    invocations = len(durations)
+    gb_seconds = billed_seconds * memory_mb / 1024
+    cost = gb_seconds * PRICE_PER_GB_SECOND + invocations * PRICE_PER_REQUEST
+    return {
+        'seconds_per_campaign': sum(durations) / campaigns,
+        'max_invocation': max(durations),
+        'cost_per_campaign': cost / campaigns,
+        'fits_memory': memory_mb >= result['peak_rss_mb'] * 1.2,
+        'fits_timeout': max(durations) < CURRENT_TIMEOUT_SECONDS
+    }
+
+
+def report(results, memory_sizes, campaigns):
+    """Print measured numbers and the memory/batch size estimates"""
+    print("\n📏 Measured (local, full CPU unless --cpus)")
+    print(f"  {'batch':>5} {'invocations':>11} {'wall/campaign':>14} {'cpu/campaign':>13} "
+          f"{'max invocation':>15} {'cold import':>12} {'peak RSS':>9}")
+    for result in results:
+        walls = [w for w, _ in result['invocations']]
+        cpus = [c for _, c in result['invocations']]
+        print(f"  {result['batch_size']:>5} {len(walls):>11} "
+              f"{sum(walls) / campaigns:>12.2f} s {sum(cpus) / campaigns * 1000:>10.1f} ms "
+              f"{max(walls):>13.2f} s {result['init_wall'] * 1000:>9.0f} ms "
+              f"{result['peak_rss_mb']:>6.1f} MB")
+
+    print(f"\n💰 Estimated per campaign ({results[0]['records_per_campaign']} records)")
+    print(f"  {'memory':>7} {'batch':>5} {'duration':>10} {'$/campaign':>12} {'$/1000':>9}  notes")
+    best = None
+    for memory_mb in memory_sizes:
+        for result in results:
+            est = estimate(result, memory_mb, campaigns)
+            notes = []
+            if not est['fits_memory']:
+                notes.append('RSS too close to limit')
+            if not est['fits_timeout']:
+                notes.append(f"invocation over {CURRENT_TIMEOUT_SECONDS}s timeout")
+            if memory_mb == CURRENT_MEMORY_MB and result['batch_size'] == 1:
+                notes.append('current')
+            if not notes or notes == ['current']:
+                if best is None or est['cost_per_campaign'] < best[2]['cost_per_campaign']:
+                    best = (memory_mb, result['batch_size'], est)
+            print(f"  {memory_mb:>5}MB {result['batch_size']:>5} {est['seconds_per_campaign']:>8.2f} s "
+                  f"{est['cost_per_campaign']:>12.8f} {est['cost_per_campaign'] * 1000:>9.5f}  {', '.join(notes)}")
+
+    if best:
+        memory_mb, batch_size, est = best
+        print(f"\n✅ Cheapest viable: {memory_mb} MB, BatchSize {batch_size} "
+              f"(~{est['seconds_per_campaign']:.2f}s and ${est['cost_per_campaign'] * 1000:.5f} per 1000 campaigns)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Worker Lambda right-sizing benchmark")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES,
+                        help=f"SQS records per invocation (default: {DEFAULT_BATCH_SIZES})")
+    parser.add_argument('--memory-sizes', type=int, nargs='+', default=DEFAULT_MEMORY_SIZES,
+                        help=f"Lambda memory sizes to estimate, MB (default: {DEFAULT_MEMORY_SIZES})")
+    parser.add_argument('--campaigns', type=int, default=5, help="Campaigns replayed per configuration (default: 5)")
+    parser.add_argument('--discord-latency', type=float, default=0.1,
+                        help="Stand-in latency per Discord call, seconds (default: 0.1)")
+    parser.add_argument('--cpus', type=int, help="Pin each run to this many CPUs")
+    args = parser.parse_args()
+
+    server = start_stand_in(args.discord_latency)
+    port = server.server_address[1]
+    print(f"Discord stand-in on 127.0.0.1:{port} ({args.discord_latency * 1000:.0f} ms per call)")
+
+    results = []
+    for batch_size in args.batch_sizes:
+        print(f"Running batch size {batch_size}...")
+        results.append(measure(port, batch_size, args.campaigns, args.cpus))
+
+    server.shutdown()
+    report(results, args.memory_sizes, args.campaigns)
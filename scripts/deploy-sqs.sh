@@ -5,8 +5,11 @@ echo "🚀 Deploying Channelwright with SQS Architecture"
 echo "================================================"
 
 # Load environment variables
+# (sourced rather than split on spaces, so quoted JSON values survive)
 if [ -f .env ]; then
-    export $(cat .env | grep -v '^#' | xargs)
+    set -a
+    . ./.env
+    set +a
 else
     echo "Error: .env file not found. Copy .env.example to .env and configure it."
     exit 1
@@ -51,14 +54,21 @@ echo "🔧 Step 2: Creating/Updating SQS Queue and Worker Lambda..."
 
 # Check if stack exists
 STACK_NAME="channelwright-sqs-stack"
+export MAIN_LAMBDA_ARN="arn:aws:lambda:$AWS_REGION:$(aws sts get-caller-identity --query Account --output text):function:$LAMBDA_FUNCTION_NAME"
+
+# DISCORD_BOT_TOKEN_POOL is JSON, so parameters are passed as JSON too
+STACK_PARAMETERS=$(python3 -c 'import json, os; print(json.dumps([
+    {"ParameterKey": "DiscordBotToken", "ParameterValue": os.environ["DISCORD_BOT_TOKEN"]},
+    {"ParameterKey": "DiscordBotTokenPool", "ParameterValue": os.environ.get("DISCORD_BOT_TOKEN_POOL", "")},
+    {"ParameterKey": "MainLambdaArn", "ParameterValue": os.environ["MAIN_LAMBDA_ARN"]}
+]))')
+
 if aws cloudformation describe-stacks --stack-name $STACK_NAME --region $AWS_REGION >/dev/null 2>&1; then
     echo "Updating existing CloudFormation stack..."
     aws cloudformation update-stack \
         --stack-name $STACK_NAME \
         --template-body file://infrastructure/sqs-worker.yaml \
-        --parameters \
-            ParameterKey=DiscordBotToken,ParameterValue=$DISCORD_BOT_TOKEN \
-            ParameterKey=MainLambdaArn,ParameterValue=arn:aws:lambda:$AWS_REGION:$(aws sts get-caller-identity --query Account --output text):function:$LAMBDA_FUNCTION_NAME \
+        --parameters "$STACK_PARAMETERS" \
         --capabilities CAPABILITY_NAMED_IAM \
         --region $AWS_REGION
     
@@ -69,9 +79,7 @@ else
     aws cloudformation create-stack \
         --stack-name $STACK_NAME \
         --template-body file://infrastructure/sqs-worker.yaml \
-        --parameters \
-            ParameterKey=DiscordBotToken,ParameterValue=$DISCORD_BOT_TOKEN \
-            ParameterKey=MainLambdaArn,ParameterValue=arn:aws:lambda:$AWS_REGION:$(aws sts get-caller-identity --query Account --output text):function:$LAMBDA_FUNCTION_NAME \
+        --parameters "$STACK_PARAMETERS" \
         --capabilities CAPABILITY_NAMED_IAM \
         --region $AWS_REGION
     
@@ -131,10 +139,17 @@ aws lambda update-function-code \
     --query '{FunctionName: FunctionName, Runtime: Runtime, CodeSize: CodeSize}' \
     --output json
 
-# Update main Lambda environment variables
+# Update main Lambda environment variables (JSON form, as the token pool contains commas)
+export QUEUE_URL
+MAIN_ENVIRONMENT=$(python3 -c 'import json, os; print(json.dumps({"Variables": {
+    "DISCORD_PUBLIC_KEY": os.environ.get("DISCORD_PUBLIC_KEY", ""),
+    "DISCORD_BOT_TOKEN": os.environ["DISCORD_BOT_TOKEN"],
+    "DISCORD_BOT_TOKEN_POOL": os.environ.get("DISCORD_BOT_TOKEN_POOL", ""),
+    "SQS_QUEUE_URL": os.environ["QUEUE_URL"]
+}}))')
 aws lambda update-function-configuration \
     --function-name $LAMBDA_FUNCTION_NAME \
-    --environment "Variables={DISCORD_PUBLIC_KEY=$DISCORD_PUBLIC_KEY,DISCORD_BOT_TOKEN=$DISCORD_BOT_TOKEN,SQS_QUEUE_URL=$QUEUE_URL}" \
+    --environment "$MAIN_ENVIRONMENT" \
     --timeout 30 \
     --region $AWS_REGION \
     --query '{FunctionName: FunctionName, Timeout: Timeout}' \
@@ -0,0 +1,333 @@
+"""
+Load generator for the Discord interaction endpoint
+
+Signs realistic interactions with a throwaway Ed25519 keypair and drives
+bot.lambda_handler either in-process or over HTTP, then reports throughput
+and acknowledgement latency against Discord's 3-second deadline.
+
+Examples:
+    # In-process, 20 requests/second for 30 seconds, Discord/SQS stubbed
+    python scripts/load_test.py --rate 20 --duration 30
+
+    # 10 concurrent callers against a local HTTP server
+    python scripts/load_test.py --concurrency 10 --requests 500 \
+        --url http://localhost:8000/interactions --key-file loadtest.key
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from nacl.signing import SigningKey
+from nacl.encoding import HexEncoder
+
+# Discord fails an interaction that is not acknowledged within 3 seconds
+ACK_DEADLINE_SECONDS = 3.0
+
+DEFAULT_MIX = 'ping=1,add-campaign=1,delete-campaign=1'
+
+LOAD_TEST_CAMPAIGN = 'Load Test'
+
+
+def load_keypair(key_file=None):
+    """
+    Create a test signing key and its hex-encoded public key
+    With key_file, the seed is reused across runs so a server can keep
+    the same DISCORD_PUBLIC_KEY
+    """
+    if key_file and os.path.exists(key_file):
+        with open(key_file) as f:
+            signing_key = SigningKey(f.read().strip(), encoder=HexEncoder)
+    else:
+        signing_key = SigningKey.generate()
+        if key_file:
+            with open(key_file, 'w') as f:
+                f.write(signing_key.encode(encoder=HexEncoder).decode())
+    public_key = signing_key.verify_key.encode(encoder=HexEncoder).decode()
+    return signing_key, public_key
+
+
+def sign_interaction(signing_key, body):
+    """Return the signature headers Discord would send for a body"""
+    timestamp = str(int(time.time()))
+    signature = signing_key.sign(f"{timestamp}{body}".encode()).signature.hex()
+    return {
+        'x-signature-ed25519': signature,
+        'x-signature-timestamp': timestamp,
+        'content-type': 'application/json'
+    }
+
+
+def build_interaction(kind, seq, guild_id='100000000000000001', application_id='200000000000000002'):
+    """Build a realistic interaction payload of the given kind"""
+    if kind == 'ping':
+        return {'type': 1, 'application_id': application_id}
+
+    # Deletes target the campaign the stub always reports as existing
+    campaign_name = LOAD_TEST_CAMPAIGN if kind == 'delete-campaign' else f"{LOAD_TEST_CAMPAIGN} {seq}"
+    return {
+        'type': 2,  # APPLICATION_COMMAND
+        'id': str(300000000000000000 + seq),
+        'application_id': application_id,
+        'token': f"load-test-token-{seq}",
+        'guild_id': guild_id,
+        'channel_id': '400000000000000004',
+        'member': {
+            'user': {'id': '500000000000000005', 'username': 'LoadTester'},
+            'roles': [],
+            'permissions': '8'
+        },
+        'data': {
+            'id': '600000000000000006',
+            'name': kind,
+            'type': 1,
+            'options': [{'name': 'name', 'type': 3, 'value': campaign_name}]
+        }
+    }
+
+
+def parse_mix(mix):
+    """Parse 'ping=1,add-campaign=2' into (kinds, weights)"""
+    kinds, weights = [], []
+    for part in mix.split(','):
+        kind, _, weight = part.partition('=')
+        kinds.append(kind.strip())
+        weights.append(float(weight or 1))
+    return kinds, weights
+
+
+class FakeResponse:
+    """Minimal stand-in for a requests.Response from Discord"""
+
+    def __init__(self, data, status_code=200):
+        self._data = data
+        self.status_code = status_code
+        self.text = json.dumps(data)
+        self.content = b'' if status_code == 204 else self.text.encode()
+        self.headers = {}
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        pass
+
+
+class DiscordStub:
+    """Stands in for Discord REST and SQS with a fixed latency per call"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._next_id = 700000000000000000
+
+    def _respond(self, name, data):
+        with self._lock:
+            self.calls[name] += 1
+            self._next_id += 1
+            next_id = str(self._next_id)
+        time.sleep(self.latency)
+        if isinstance(data, dict):
+            data = {'id': next_id, **data}
+        return data
+
+    def request(self, method, url, json=None, headers=None):
+        """Session.request entry point used by channelwright.discord_api"""
+        if method == 'GET':
+            return self.get(url)
+        if method == 'DELETE':
+            return FakeResponse(self._respond('DELETE', {}), status_code=204)
+        return FakeResponse(self._respond(method, dict(json or {})))
+
+    def get(self, url):
+        if url.endswith('/roles'):
+            roles = [{'id': '800000000000000001', 'name': f"{LOAD_TEST_CAMPAIGN} Members"}]
+            return FakeResponse(self._respond('GET', roles))
+        # A full campaign category so delete-campaign walks every channel
+        from channelwright.campaign_config import DEFAULT_CAMPAIGN_CHANNELS
+        category_id = '800000000000000002'
+        channels = [{'id': category_id, 'name': LOAD_TEST_CAMPAIGN, 'type': 4}]
+        channels += [
+            {'id': str(810000000000000000 + idx), 'name': ch['name'], 'type': ch['type'], 'parent_id': category_id}
+            for idx, ch in enumerate(DEFAULT_CAMPAIGN_CHANNELS)
+        ]
+        return FakeResponse(self._respond('GET', channels))
+
+    def send_message(self, QueueUrl=None, MessageBody=None, DelaySeconds=0):
+        return self._respond('SQS', {'MessageId': 'stub'})
+
+
+def install_stub(bot_module, latency):
+    """Route the bot module's outbound Discord and SQS calls to a stub"""
+    from channelwright import discord_api
+    stub = DiscordStub(latency)
+    discord_api.get_session = lambda bot_token=None: stub
+    bot_module.sqs = stub
+    return stub
+
+
+def make_in_process_caller(public_key, discord_latency):
+    """Return a callable that invokes lambda_handler directly"""
+    os.environ['DISCORD_PUBLIC_KEY'] = public_key
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('SQS_QUEUE_URL', 'https://sqs.us-east-1.amazonaws.com/000000000000/load-test')
+    os.environ.setdefault('DISCORD_BOT_TOKEN', 'load-test-bot-token')
+
+    from channelwright import bot
+    stub = install_stub(bot, discord_latency)
+
+    def call(headers, body):
+        response = bot.lambda_handler({'headers': headers, 'body': body}, None)
+        return response['statusCode']
+
+    return call, stub
+
+
+def make_http_caller(url):
+    """Return a callable that POSTs to an HTTP interaction endpoint"""
+    import requests
+    session = requests.Session()
+
+    def call(headers, body):
+        response = session.post(url, data=body.encode(), headers=headers, timeout=30)
+        return response.status_code
+
+    return call
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_load(call, signing_key, kinds, weights, rate=None, concurrency=None, duration=10.0, total=None):
+    """
+    Drive the endpoint at a fixed request rate (open loop) or with N
+    concurrent callers (closed loop) and collect per-request results
+    """
+    results = []
+    results_lock = threading.Lock()
+    seq_lock = threading.Lock()
+    counter = [0]
+
+    def next_seq():
+        with seq_lock:
+            counter[0] += 1
+            return counter[0]
+
+    def one_request(seq, scheduled=None):
+        # Open-loop latency runs from the scheduled send time, so time spent
+        # queued behind slow requests counts (no coordinated omission)
+        kind = random.choices(kinds, weights)[0]
+        body = json.dumps(build_interaction(kind, seq))
+        headers = sign_interaction(signing_key, body)
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            status = call(headers, body)
+        except Exception as e:
+            status = f"error: {type(e).__name__}"
+        elapsed = time.perf_counter() - start
+        with results_lock:
+            results.append((kind, status, elapsed))
+
+    started = time.perf_counter()
+    deadline = started + duration
+
+    if rate:
+        # Open loop: send on schedule whether or not earlier requests finished
+        interval = 1.0 / rate
+        with ThreadPoolExecutor(max_workers=max(4, int(rate * ACK_DEADLINE_SECONDS * 2))) as executor:
+            next_send = started
+            while time.perf_counter() < deadline and (total is None or counter[0] < total):
+                executor.submit(one_request, next_seq(), next_send)
+                next_send += interval
+                time.sleep(max(0.0, next_send - time.perf_counter()))
+    else:
+        def caller():
+            while time.perf_counter() < deadline:
+                seq = next_seq()
+                if total is not None and seq > total:
+                    return
+                one_request(seq)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(caller)
+
+    return results, time.perf_counter() - started
+
+
+def report(results, wall_time, stub=None):
+    """Print throughput, latency percentiles and deadline misses"""
+    latencies = sorted(r[2] for r in results)
+    statuses = Counter(r[1] for r in results)
+    late = sum(1 for latency in latencies if latency > ACK_DEADLINE_SECONDS)
+
+    print("\n📊 Load test results")
+    print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+    print(f"Requests:    {len(results)} in {wall_time:.2f}s")
+    print(f"Throughput:  {len(results) / wall_time if wall_time else 0:.1f} req/s")
+    print(f"Statuses:    {dict(statuses)}")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Latency p95: {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"Latency p99: {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"Max:         {(latencies[-1] if latencies else 0) * 1000:.1f} ms")
+    print(f"Over {ACK_DEADLINE_SECONDS:.0f}s deadline: {late} ({late / len(results) * 100 if results else 0:.1f}%)")
+
+    for kind in sorted({r[0] for r in results}):
+        kind_latencies = sorted(r[2] for r in results if r[0] == kind)
+        print(f"  {kind:<16} n={len(kind_latencies):<6} "
+              f"p50={percentile(kind_latencies, 50) * 1000:.1f}ms "
+              f"p99={percentile(kind_latencies, 99) * 1000:.1f}ms")
+
+    if stub is not None:
+        print(f"Stubbed outbound calls: {dict(stub.calls)}")
+    return late == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Signed-interaction load generator")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--rate', type=float, help="Target requests per second (open loop)")
+    mode.add_argument('--concurrency', type=int, help="Number of concurrent callers (closed loop)")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run (default: 10)")
+    parser.add_argument('--requests', type=int, help="Stop after this many requests")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Weighted interaction mix (default: {DEFAULT_MIX})")
+    parser.add_argument('--url', help="POST to this HTTP endpoint instead of calling lambda_handler in-process")
+    parser.add_argument('--key-file', help="Reuse (or create) the signing key seed in this file")
+    parser.add_argument('--discord-latency', type=float, default=0.15,
+                        help="Simulated Discord/SQS latency per call in-process (default: 0.15s)")
+    args = parser.parse_args()
+
+    signing_key, public_key = load_keypair(args.key_file)
+    print(f"🔑 Test public key: {public_key}")
+
+    stub = None
+    if args.url:
+        print(f"Target: {args.url} (server must use DISCORD_PUBLIC_KEY={public_key})")
+        call = make_http_caller(args.url)
+    else:
+        print(f"Target: in-process lambda_handler (Discord/SQS stubbed at {args.discord_latency * 1000:.0f} ms)")
+        call, stub = make_in_process_caller(public_key, args.discord_latency)
+
+    kinds, weights = parse_mix(args.mix)
+    results, wall_time = run_load(
+        call, signing_key, kinds, weights,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        total=args.requests
+    )
+    if not report(results, wall_time, stub):
+        sys.exit(1)
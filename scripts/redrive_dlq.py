@@ -0,0 +1,248 @@
+"""
+Rate-aware dead-letter queue redrive
+
+Drains channelwright-tasks-dlq, groups the tasks by campaign, drops or
+rewrites stale work and replays the rest through the worker logic at a
+controlled rate.
+
+- Interaction tokens expire 15 minutes after the interaction. Replayed
+  tasks with expired tokens have the token stripped, so the worker does the
+  Discord work without trying to edit a dead message. Tasks that only edit
+  the message (completion summaries) are dropped.
+- Duplicate create_channel tasks are collapsed, and channels that already
+  exist in the campaign category are skipped, using one channel fetch per guild.
+- Tasks for categories that no longer exist are dropped.
+- Only tasks that replay successfully are deleted from the DLQ.
+
+Examples:
+    python scripts/redrive_dlq.py --dry-run
+    python scripts/redrive_dlq.py --rate 2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import boto3
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DLQ_NAME = 'channelwright-tasks-dlq'
+
+# Discord interaction tokens are valid for 15 minutes
+INTERACTION_TOKEN_TTL_SECONDS = 15 * 60
+
+# Leave headroom so a token does not expire mid-replay
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+
+# Tasks that only update the interaction message
+MESSAGE_ONLY_TASKS = ('complete',)
+
+
+def drain_queue(sqs, queue_url, max_messages, visibility_timeout):
+    """
+    Receive up to max_messages from the queue in batches of 10
+    Messages stay invisible for visibility_timeout while they are replayed
+    """
+    messages = []
+    while len(messages) < max_messages:
+        response = sqs.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=min(10, max_messages - len(messages)),
+            WaitTimeSeconds=1,
+            VisibilityTimeout=visibility_timeout,
+            AttributeNames=['SentTimestamp', 'ApproximateReceiveCount']
+        )
+        batch = response.get('Messages', [])
+        if not batch:
+            break
+        messages.extend(batch)
+        print(f"Received {len(messages)} message(s)")
+    return messages
+
+
+def token_expired(sqs_message, now=None):
+    """
+    Return True if the interaction token in a message can no longer be used
+    SentTimestamp is kept from the original queue when SQS moves a message
+    to the DLQ, so it approximates the interaction time
+    """
+    now = now if now is not None else time.time()
+    sent_at = int(sqs_message['Attributes']['SentTimestamp']) / 1000
+    return now - sent_at > INTERACTION_TOKEN_TTL_SECONDS - TOKEN_EXPIRY_MARGIN_SECONDS
+
+
+def campaign_key(task):
+    """
+    Group key for a task: one campaign in one guild
+    """
+    return (task.get('guild_id'), task.get('campaign_name') or '*')
+
+
+def plan_redrive(sqs_messages, guild_channels, now=None):
+    """
+    Decide what to do with each DLQ message
+    Returns (campaigns, dropped) where campaigns maps a campaign key to an
+    ordered list of (sqs_message, task) to replay, and dropped is a list of
+    (sqs_message, reason)
+    """
+    campaigns = OrderedDict()
+    dropped = []
+    seen_channels = set()
+
+    def sort_key(m):
+        task = m['task']
+        return (0 if task['task_type'] not in MESSAGE_ONLY_TASKS else 1, task.get('current', 0))
+
+    parsed = []
+    for sqs_message in sqs_messages:
+        try:
+            task = json.loads(sqs_message['Body'])
+        except ValueError:
+            dropped.append((sqs_message, 'unparseable body'))
+            continue
+        parsed.append({'sqs_message': sqs_message, 'task': task})
+
+    # Completion messages queued before they carried guild_id are matched to
+    # their campaign through the interaction that queued them
+    interaction_guilds = {
+        item['task'].get('interaction_token'): item['task']['guild_id']
+        for item in parsed if item['task'].get('guild_id') and item['task'].get('interaction_token')
+    }
+    for item in parsed:
+        task = item['task']
+        if not task.get('guild_id') and task.get('interaction_token') in interaction_guilds:
+            item['task'] = {**task, 'guild_id': interaction_guilds[task['interaction_token']]}
+
+    for item in sorted(parsed, key=sort_key):
+        sqs_message, task = item['sqs_message'], item['task']
+        task_type = task.get('task_type')
+
+        if token_expired(sqs_message, now):
+            if task_type in MESSAGE_ONLY_TASKS:
+                dropped.append((sqs_message, 'interaction token expired'))
+                continue
+            task = {k: v for k, v in task.items() if k not in ('application_id', 'interaction_token')}
+
+        if task_type == 'create_channel':
+            channels = guild_channels.get(task['guild_id'], [])
+            category_id = task['category_id']
+            name = task['channel_config']['name']
+            if not any(ch['id'] == category_id for ch in channels):
+                dropped.append((sqs_message, f"category for {task.get('campaign_name')} no longer exists"))
+                continue
+            if (category_id, name) in seen_channels:
+                dropped.append((sqs_message, f"duplicate task for {name}"))
+                continue
+            seen_channels.add((category_id, name))
+            if any(ch.get('parent_id') == category_id and ch.get('name') == name for ch in channels):
+                dropped.append((sqs_message, f"{name} already exists"))
+                continue
+
+        campaigns.setdefault(campaign_key(task), []).append((sqs_message, task))
+
+    return campaigns, dropped
+
+
+def replay(campaigns, rate, handler):
+    """
+    Run each task through the worker handler, at most `rate` tasks per second
+    A campaign stops at its first failed task; its remaining messages stay in
+    the queue and reappear after the visibility timeout
+    Returns (replayed, failed) receipt handles
+    """
+    interval = 1.0 / rate
+    replayed = []
+    failed = []
+    next_run = time.monotonic()
+    for (guild_id, campaign_name), tasks in campaigns.items():
+        print(f"Replaying {len(tasks)} task(s) for {campaign_name} (guild {guild_id})")
+        for sqs_message, task in tasks:
+            time.sleep(max(0.0, next_run - time.monotonic()))
+            next_run = time.monotonic() + interval
+            record = {'messageId': sqs_message['MessageId'], 'body': json.dumps(task)}
+            result = handler({'Records': [record]}, None) or {}
+            if result.get('batchItemFailures'):
+                print(f"  ✗ {task['task_type']} failed, leaving {campaign_name} in the queue")
+                failed.append(sqs_message['ReceiptHandle'])
+                break
+            replayed.append(sqs_message['ReceiptHandle'])
+    return replayed, failed
+
+
+def delete_messages(sqs, queue_url, receipt_handles):
+    """
+    Delete handled messages from the queue in batches of 10
+    """
+    for start in range(0, len(receipt_handles), 10):
+        batch = receipt_handles[start:start + 10]
+        sqs.delete_message_batch(
+            QueueUrl=queue_url,
+            Entries=[{'Id': str(idx), 'ReceiptHandle': handle} for idx, handle in enumerate(batch)]
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay the Channelwright dead-letter queue")
+    parser.add_argument('--queue-url', help=f"DLQ URL (default: look up {DLQ_NAME})")
+    parser.add_argument('--rate', type=float, default=2.0, help="Tasks replayed per second (default: 2)")
+    parser.add_argument('--max-messages', type=int, default=500, help="Stop draining after this many (default: 500)")
+    parser.add_argument('--visibility-timeout', type=int, default=900,
+                        help="Seconds drained messages stay hidden while replaying (default: 900)")
+    parser.add_argument('--dry-run', action='store_true', help="Show the plan without replaying or deleting")
+    args = parser.parse_args()
+
+    if not os.environ.get('DISCORD_BOT_TOKEN') and not os.environ.get('DISCORD_BOT_TOKEN_POOL'):
+        print("Error: DISCORD_BOT_TOKEN or DISCORD_BOT_TOKEN_POOL must be set in .env file")
+        exit(1)
+
+    from channelwright import worker
+    from channelwright.campaign_sync import get_guild_channels
+    from channelwright.token_pool import get_bot_token
+
+    sqs = boto3.client('sqs', region_name=os.environ.get('AWS_REGION'))
+    queue_url = args.queue_url or sqs.get_queue_url(QueueName=DLQ_NAME)['QueueUrl']
+
+    print(f"Draining {queue_url}...")
+    sqs_messages = drain_queue(sqs, queue_url, args.max_messages, args.visibility_timeout)
+    if not sqs_messages:
+        print("Dead-letter queue is empty")
+        exit(0)
+
+    # One channel fetch per guild covers every campaign in it
+    guild_ids = set()
+    for sqs_message in sqs_messages:
+        try:
+            guild_ids.add(json.loads(sqs_message['Body']).get('guild_id'))
+        except ValueError:
+            pass
+    guild_channels = {
+        guild_id: get_guild_channels(guild_id, get_bot_token(guild_id))
+        for guild_id in guild_ids if guild_id
+    }
+
+    campaigns, dropped = plan_redrive(sqs_messages, guild_channels)
+    total = sum(len(tasks) for tasks in campaigns.values())
+
+    print(f"\n{len(sqs_messages)} message(s): {total} to replay across {len(campaigns)} campaign(s), {len(dropped)} to drop")
+    for (guild_id, campaign_name), tasks in campaigns.items():
+        types = ', '.join(sorted({task['task_type'] for _, task in tasks}))
+        print(f"  {campaign_name} (guild {guild_id}): {len(tasks)} task(s) [{types}]")
+    for _, reason in dropped:
+        print(f"  drop: {reason}")
+
+    if args.dry_run:
+        print("\nDry run, nothing replayed (messages reappear after the visibility timeout)")
+        exit(0)
+
+    replayed, failed = replay(campaigns, args.rate, worker.lambda_handler)
+    delete_messages(sqs, queue_url, replayed + [m['ReceiptHandle'] for m, _ in dropped])
+    print(f"\n✅ Replayed {len(replayed)} task(s), dropped {len(dropped)}")
+    if failed:
+        print(f"⚠️ {len(failed)} campaign(s) failed and were left in the queue (remaining tasks: {total - len(replayed)})")
@@ -1,18 +1,27 @@
 """
 Register slash commands with Discord
+Pushes the full command manifest in one bulk overwrite, and only when
+its content hash differs from the currently registered commands
 """
 import os
+import sys
+import json
+import hashlib
+import argparse
 import requests
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-DISCORD_APPLICATION_ID = os.environ.get('DISCORD_APPLICATION_ID')
+# DISCORD_APP_ID is the name used in the setup docs
+DISCORD_APPLICATION_ID = os.environ.get('DISCORD_APPLICATION_ID') or os.environ.get('DISCORD_APP_ID')
 DISCORD_BOT_TOKEN = os.environ.get('DISCORD_BOT_TOKEN')
 
-# Discord API endpoint for global commands
-url = f"https://discord.com/api/v10/applications/{DISCORD_APPLICATION_ID}/commands"
+# Comma-separated guild IDs for fast dev registration (global if empty)
+DISCORD_GUILD_IDS = os.environ.get('DISCORD_GUILD_IDS', '')
+
+DISCORD_API_BASE = "https://discord.com/api/v10"
 
 # Define commands
 commands = [
@@ -41,31 +50,182 @@ commands = [
                 "required": True
             }
         ]
+    },
+    {
+        "name": "sync-campaign",
+        "description": "Apply channel template changes to existing campaigns",
+        "type": 1,  # CHAT_INPUT
+        "options": [
+            {
+                "name": "name",
+                "description": "Name of the campaign to sync (all campaigns if omitted)",
+                "type": 3,  # STRING
+                "required": False
+            }
+        ]
+    },
+    {
+        "name": "add-campaign-members",
+        "description": "Give the campaign role to many members at once",
+        "type": 1,  # CHAT_INPUT
+        "options": [
+            {
+                "name": "name",
+                "description": "Name of the campaign",
+                "type": 3,  # STRING
+                "required": True
+            },
+            {
+                "name": "users",
+                "description": "Members to add (mention them, separated by spaces)",
+                "type": 3,  # STRING
+                "required": False
+            },
+            {
+                "name": "from_role",
+                "description": "Copy every member who has this role",
+                "type": 8,  # ROLE
+                "required": False
+            }
+        ]
+    },
+    {
+        "name": "archive-campaign",
+        "description": "Archive a finished campaign: lock posting and move it to the bottom",
+        "type": 1,  # CHAT_INPUT
+        "options": [
+            {
+                "name": "name",
+                "description": "Name of the campaign to archive",
+                "type": 3,  # STRING
+                "required": True
+            },
+            {
+                "name": "unarchive",
+                "description": "Restore an archived campaign instead",
+                "type": 5,  # BOOLEAN
+                "required": False
+            }
+        ]
     }
 ]
 
-def register_commands():
-    """Register commands with Discord"""
+def get_commands_url(guild_id=None):
+    """Return the global or guild commands endpoint"""
+    if guild_id:
+        return f"{DISCORD_API_BASE}/applications/{DISCORD_APPLICATION_ID}/guilds/{guild_id}/commands"
+    return f"{DISCORD_API_BASE}/applications/{DISCORD_APPLICATION_ID}/commands"
+
+
+# Values Discord returns (or leaves out) for fields left at their default
+COMMAND_DEFAULTS = {
+    "type": 1,
+    "description": "",
+    "options": [],
+    "default_member_permissions": None,
+    "dm_permission": True,
+    "nsfw": False
+}
+OPTION_DEFAULTS = {
+    "description": "",
+    "required": False,
+    "autocomplete": False
+}
+
+
+def project(value, template, defaults):
+    """
+    Reduce value to the keys present in template, recursively
+    Keys missing from value take Discord's default, or None if it has none
+    """
+    if isinstance(template, dict):
+        value = value if isinstance(value, dict) else {}
+        return {
+            key: project(
+                value.get(key, defaults.get(key)),
+                sub_template,
+                OPTION_DEFAULTS if key == "options" else {}
+            )
+            for key, sub_template in template.items()
+        }
+    if isinstance(template, list) and isinstance(value, list):
+        # Order matters for options; extra entries are kept so they differ
+        projected = [project(v, t, defaults) for v, t in zip(value, template)]
+        return projected + value[len(template):]
+    return value
+
+
+def normalize_command(command, template=None):
+    """Reduce a command to the fields the local manifest defines"""
+    return project(command, template or command, COMMAND_DEFAULTS)
+
+
+def manifest_hash(command_list, manifest=None):
+    """
+    Content hash of a command set, independent of command ordering
+    Each command is compared on every field its manifest entry sets
+    """
+    by_name = {c["name"]: c for c in (manifest or command_list)}
+    normalized = sorted(
+        (normalize_command(c, by_name.get(c["name"])) for c in command_list),
+        key=lambda c: c["name"]
+    )
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def register_commands(guild_id=None, force=False):
+    """Register commands with Discord if the manifest changed"""
     headers = {
         "Authorization": f"Bot {DISCORD_BOT_TOKEN}",
         "Content-Type": "application/json"
     }
+    url = get_commands_url(guild_id)
+    target = f"guild {guild_id}" if guild_id else "global"
     
-    for command in commands:
-        response = requests.post(url, json=command, headers=headers)
-        
-        if response.status_code == 200 or response.status_code == 201:
-            print(f"✓ Successfully registered command: /{command['name']}")
+    local_hash = manifest_hash(commands)
+    if not force:
+        response = requests.get(url, headers=headers)
+        if response.status_code == 200:
+            if manifest_hash(response.json(), commands) == local_hash:
+                print(f"✓ {target} commands are up to date ({local_hash[:12]}), skipping")
+                return True
         else:
-            print(f"✗ Failed to register command: /{command['name']}")
-            print(f"  Status: {response.status_code}")
-            print(f"  Response: {response.text}")
+            print(f"  Could not fetch registered {target} commands ({response.status_code}), overwriting")
+    
+    # Bulk overwrite replaces the whole command set in a single call
+    response = requests.put(url, json=commands, headers=headers)
+    
+    if response.status_code == 200:
+        print(f"✓ Registered {len(commands)} {target} commands ({local_hash[:12]}):")
+        for command in commands:
+            print(f"  /{command['name']}")
+        return True
+    
+    print(f"✗ Failed to register {target} commands")
+    print(f"  Status: {response.status_code}")
+    print(f"  Response: {response.text}")
+    return False
 
 if __name__ == '__main__':
-    if not DISCORD_APP_ID or not DISCORD_BOT_TOKEN:
+    parser = argparse.ArgumentParser(description="Register Discord slash commands")
+    parser.add_argument('--guild', action='append', default=[],
+                        help="Register to this guild instead of globally (repeatable)")
+    parser.add_argument('--force', action='store_true',
+                        help="Overwrite even if the registered commands match")
+    args = parser.parse_args()
+    
+    if not DISCORD_APPLICATION_ID or not DISCORD_BOT_TOKEN:
         print("Error: DISCORD_APP_ID and DISCORD_BOT_TOKEN must be set in .env file")
         exit(1)
     
+    guild_ids = args.guild or [g.strip() for g in DISCORD_GUILD_IDS.split(',') if g.strip()]
+    
     print("Registering Discord slash commands...")
-    register_commands()
-    print("\nDone! Commands may take a few minutes to appear in Discord.")
+    results = [register_commands(guild_id, args.force) for guild_id in (guild_ids or [None])]
+    
+    if not all(results):
+        sys.exit(1)
+    if guild_ids:
+        print("\nDone! Guild commands are available immediately.")
+    else:
+        print("\nDone! Commands may take a few minutes to appear in Discord.")
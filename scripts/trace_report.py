@@ -0,0 +1,130 @@
+"""
+Rebuild campaign timelines from TRACE log lines
+
+Reads bot and worker logs (files or stdin), groups spans by trace ID and
+prints each campaign's timeline plus latency percentiles per span type.
+
+Examples:
+    aws logs tail /aws/lambda/discord_channelwright_bot --since 1h > bot.log
+    aws logs tail /aws/lambda/discord_channelwright_worker --since 1h > worker.log
+    python scripts/trace_report.py bot.log worker.log
+    python scripts/trace_report.py bot.log worker.log --campaign "Curse of Strahd"
+"""
+import sys
+import json
+import argparse
+import fileinput
+from collections import defaultdict
+
+TRACE_LOG_PREFIX = 'TRACE '
+
+
+def parse_spans(lines):
+    """
+    Extract span records from log lines (any prefix before TRACE is ignored)
+    """
+    spans = []
+    for line in lines:
+        idx = line.find(TRACE_LOG_PREFIX + '{')
+        if idx < 0:
+            continue
+        try:
+            spans.append(json.loads(line[idx + len(TRACE_LOG_PREFIX):].strip()))
+        except ValueError:
+            continue
+    return spans
+
+
+def group_traces(spans):
+    """
+    Group spans by trace ID, sorted by start time
+    """
+    traces = defaultdict(list)
+    for record in spans:
+        traces[record['trace_id']].append(record)
+    for records in traces.values():
+        records.sort(key=lambda r: r['start'])
+    return traces
+
+
+def trace_summary(records):
+    """
+    Summarize one trace: campaign, command, start and end-to-end duration
+    """
+    start = min(r['start'] for r in records)
+    end = max(r['start'] + r['duration_ms'] / 1000 for r in records)
+    return {
+        'campaign_name': next((r['campaign_name'] for r in records if r.get('campaign_name')), '?'),
+        'command': next((r['command'] for r in records if r.get('command')), '?'),
+        'start': start,
+        'duration_ms': (end - start) * 1000,
+        'spans': len(records)
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def print_timeline(trace_id, records):
+    """
+    Print a trace's spans as offsets from the first span
+    """
+    summary = trace_summary(records)
+    start = summary['start']
+    print(f"\n🧵 {summary['campaign_name']} [{summary['command']}] trace {trace_id}: "
+          f"{summary['duration_ms'] / 1000:.2f}s over {summary['spans']} spans")
+    for r in records:
+        offset = (r['start'] - start) * 1000
+        detail = r.get('route') or r.get('task_type') or ''
+        status = f" {r['status']}" if r.get('status') else ''
+        retries = f" x{r['attempts']}" if r.get('attempts', 1) > 1 else ''
+        error = f" ❌ {r['error']}" if r.get('error') else ''
+        print(f"  +{offset:9.1f} ms  {r['duration_ms']:8.1f} ms  {r['span']:<11} {detail}{status}{retries}{error}")
+
+
+def print_percentiles(traces):
+    """
+    Print end-to-end and per-span-type latency percentiles
+    """
+    rows = defaultdict(list)
+    for records in traces.values():
+        rows['end-to-end'].append(trace_summary(records)['duration_ms'])
+        for r in records:
+            rows[r['span']].append(r['duration_ms'])
+
+    print(f"\n📊 Latency percentiles ({len(traces)} trace(s))")
+    print(f"  {'span':<12} {'count':>6} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for name in ['end-to-end'] + sorted(n for n in rows if n != 'end-to-end'):
+        values = sorted(rows[name])
+        print(f"  {name:<12} {len(values):>6} "
+              f"{percentile(values, 50):>8.1f}ms {percentile(values, 95):>8.1f}ms "
+              f"{percentile(values, 99):>8.1f}ms {values[-1]:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Campaign trace report")
+    parser.add_argument('files', nargs='*', help="Log files (default: stdin)")
+    parser.add_argument('--campaign', help="Only show traces for this campaign")
+    parser.add_argument('--trace', help="Only show this trace ID")
+    parser.add_argument('--slowest', type=int, default=10, help="Timelines to print, slowest first (default: 10)")
+    args = parser.parse_args()
+
+    traces = group_traces(parse_spans(fileinput.input(args.files or ['-'])))
+    if args.trace:
+        traces = {k: v for k, v in traces.items() if k == args.trace}
+    if args.campaign:
+        traces = {k: v for k, v in traces.items() if trace_summary(v)['campaign_name'] == args.campaign}
+
+    if not traces:
+        print("No matching traces found")
+        sys.exit(1)
+
+    slowest = sorted(traces.items(), key=lambda item: trace_summary(item[1])['duration_ms'], reverse=True)
+    for trace_id, records in slowest[:args.slowest]:
+        print_timeline(trace_id, records)
+    print_percentiles(traces)
@@ -3,34 +3,61 @@ Discord Channelwright Bot - Main Handler
 Uses SQS for async channel creation with progress updates
 """
 import os
+import re
 import json
+import time
+from functools import lru_cache
 import boto3
 import requests
-from discord_interactions import verify_key, InteractionType, InteractionResponseType
+from nacl.signing import VerifyKey
+from discord_interactions import InteractionType, InteractionResponseType
 from channelwright.campaign_config import DEFAULT_CAMPAIGN_CHANNELS
+from channelwright.campaign_archive import archive_campaign
+from channelwright.discord_api import discord_request
+from channelwright.token_pool import get_bot_token
+from channelwright.profiling import profiled
+from channelwright.tracing import new_trace_id, set_trace, get_trace_id, record_span, span
+
+# Matches user mentions (<@123>, <@!123>) and bare user IDs separated by
+# spaces or commas; role (<@&123>) and channel (<#123>) mentions are ignored
+USER_ID_PATTERN = re.compile(r'<@!?(\d+)>|(?<![^\s,])(\d{17,20})(?![^\s,])')
 
 # Initialize SQS client
 sqs = boto3.client('sqs')
 
 
+@lru_cache(maxsize=4)
+def get_verify_key(public_key):
+    """
+    Parse the application public key once per process
+    """
+    return VerifyKey(bytes.fromhex(public_key))
+
+
+def verify_signature(raw_body, signature, timestamp, public_key):
+    """
+    Verify a Discord request signature (same checks as discord_interactions.verify_key)
+    """
+    message = timestamp.encode() + raw_body
+    try:
+        get_verify_key(public_key).verify(message, bytes.fromhex(signature))
+        return True
+    except Exception as e:
+        print(e)
+    return False
+
+
 def create_role(guild_id, role_name, bot_token):
     """
     Create a Discord role using Discord API
     """
-    url = f"https://discord.com/api/v10/guilds/{guild_id}/roles"
-    headers = {
-        "Authorization": f"Bot {bot_token}",
-        "Content-Type": "application/json"
-    }
     payload = {
         "name": role_name,
         "mentionable": True
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return discord_request('POST', f"/guilds/{guild_id}/roles", bot_token, payload)
     except requests.exceptions.RequestException as e:
         print(f"Error creating role: {e}")
         if hasattr(e, 'response') and e.response is not None:
@@ -42,12 +69,6 @@ def create_channel_category(guild_id, category_name, campaign_role_id, bot_token
     """
     Create a private Discord channel category with campaign role access
     """
-    url = f"https://discord.com/api/v10/guilds/{guild_id}/channels"
-    headers = {
-        "Authorization": f"Bot {bot_token}",
-        "Content-Type": "application/json"
-    }
-    
     # Make category private: deny @everyone, allow campaign role
     permission_overwrites = [
         {
@@ -69,9 +90,7 @@ def create_channel_category(guild_id, category_name, campaign_role_id, bot_token
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return discord_request('POST', f"/guilds/{guild_id}/channels", bot_token, payload)
     except requests.exceptions.RequestException as e:
         print(f"Error creating category: {e}")
         if hasattr(e, 'response') and e.response is not None:
@@ -79,10 +98,38 @@ def create_channel_category(guild_id, category_name, campaign_role_id, bot_token
         raise
 
 
+def parse_user_ids(text):
+    """
+    Extract unique user IDs from mentions or raw IDs, keeping their order
+    """
+    user_ids = []
+    for mention_id, raw_id in USER_ID_PATTERN.findall(text or ''):
+        user_id = mention_id or raw_id
+        if user_id not in user_ids:
+            user_ids.append(user_id)
+    return user_ids
+
+
+def send_task(queue_url, message, delay_seconds=0):
+    """
+    Queue a worker task, tagged with the current trace ID
+    """
+    with span('enqueue', task_type=message['task_type']):
+        sqs.send_message(
+            QueueUrl=queue_url,
+            MessageBody=json.dumps({**message, 'trace_id': get_trace_id()}),
+            DelaySeconds=delay_seconds
+        )
+
+
+@profiled('bot')
 def lambda_handler(event, context):
     """
     AWS Lambda handler for Discord interactions
     """
+    # Clear any trace left by a previous request on this thread
+    set_trace(None)
+    
     # Get headers (handle both lowercase and mixed case)
     headers = event.get('headers', {})
     
@@ -93,9 +140,10 @@ def lambda_handler(event, context):
     
     # Verify request is from Discord
     public_key = os.environ.get('DISCORD_PUBLIC_KEY')
+    verify_started = time.time()
     
     try:
-        if not verify_key(body.encode(), signature, timestamp, public_key):
+        if not verify_signature(body.encode(), signature, timestamp, public_key):
             print(f"Signature verification failed. Signature: {signature}, Timestamp: {timestamp}")
             return {
                 'statusCode': 401,
@@ -108,6 +156,8 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': 'Signature verification error'})
         }
     
+    verify_finished = time.time()
+    
     # Parse the request body
     body_json = json.loads(body)
     
@@ -127,6 +177,16 @@ def lambda_handler(event, context):
     if body_json.get('type') == InteractionType.APPLICATION_COMMAND:
         command_name = body_json.get('data', {}).get('name')
         
+        # Start the trace that follows this interaction through the worker
+        options = body_json.get('data', {}).get('options', [])
+        set_trace(
+            new_trace_id(body_json.get('id')),
+            command=command_name,
+            guild_id=body_json.get('guild_id'),
+            campaign_name=next((o.get('value') for o in options if o.get('name') == 'name'), None)
+        )
+        record_span('verify', verify_started, verify_finished)
+        
         if command_name == 'add-campaign':
             # Extract campaign name from options
             options = body_json.get('data', {}).get('options', [])
@@ -172,7 +232,7 @@ def lambda_handler(event, context):
                 }
             
             # Get Discord credentials
-            bot_token = os.environ.get('DISCORD_BOT_TOKEN')
+            bot_token = get_bot_token(guild_id)
             application_id = body_json.get('application_id')
             interaction_token = body_json.get('token')
             queue_url = os.environ.get('SQS_QUEUE_URL')
@@ -212,15 +272,13 @@ def lambda_handler(event, context):
                         'campaign_name': campaign_name
                     }
                     
-                    sqs.send_message(
-                        QueueUrl=queue_url,
-                        MessageBody=json.dumps(message)
-                    )
+                    send_task(queue_url, message)
                     print(f"Queued channel {idx}/{total_channels}: {channel_config['name']}")
                 
                 # Queue completion message
                 completion_message = {
                     'task_type': 'complete',
+                    'guild_id': guild_id,
                     'application_id': application_id,
                     'interaction_token': interaction_token,
                     'campaign_name': campaign_name,
@@ -235,10 +293,10 @@ def lambda_handler(event, context):
                     ]
                 }
                 
-                sqs.send_message(
-                    QueueUrl=queue_url,
-                    MessageBody=json.dumps(completion_message),
-                    DelaySeconds=total_channels * 2  # Delay to ensure all channels are created first
+                send_task(
+                    queue_url,
+                    completion_message,
+                    delay_seconds=total_channels * 2  # Delay to ensure all channels are created first
                 )
                 
                 print(f"All tasks queued successfully")
@@ -316,20 +374,12 @@ def lambda_handler(event, context):
                     })
                 }
             
-            bot_token = os.environ.get('DISCORD_BOT_TOKEN')
+            bot_token = get_bot_token(guild_id)
             
             try:
                 # Step 1: Find the category by name
                 print(f"Looking for category: {campaign_name}")
-                channels_url = f"https://discord.com/api/v10/guilds/{guild_id}/channels"
-                headers = {
-                    "Authorization": f"Bot {bot_token}",
-                    "Content-Type": "application/json"
-                }
-                
-                response = requests.get(channels_url, headers=headers)
-                response.raise_for_status()
-                all_channels = response.json()
+                all_channels = discord_request('GET', f"/guilds/{guild_id}/channels", bot_token)
                 
                 # Find the category
                 category = None
@@ -366,34 +416,25 @@ def lambda_handler(event, context):
                     channel_id = channel['id']
                     print(f"Deleting channel: {channel_name} ({channel_id})")
                     
-                    delete_url = f"https://discord.com/api/v10/channels/{channel_id}"
-                    response = requests.delete(delete_url, headers=headers)
-                    response.raise_for_status()
+                    discord_request('DELETE', f"/channels/{channel_id}", bot_token)
                     deleted_channels.append(channel_name)
                 
                 # Step 3: Delete the category
                 print(f"Deleting category: {category_id}")
-                delete_url = f"https://discord.com/api/v10/channels/{category_id}"
-                response = requests.delete(delete_url, headers=headers)
-                response.raise_for_status()
+                discord_request('DELETE', f"/channels/{category_id}", bot_token)
                 
                 # Step 4: Find and delete the role
                 role_name = f"{campaign_name} Members"
                 print(f"Looking for role: {role_name}")
                 
-                roles_url = f"https://discord.com/api/v10/guilds/{guild_id}/roles"
-                response = requests.get(roles_url, headers=headers)
-                response.raise_for_status()
-                roles = response.json()
+                roles = discord_request('GET', f"/guilds/{guild_id}/roles", bot_token)
                 
                 role_deleted = False
                 for role in roles:
                     if role.get('name') == role_name:
                         role_id = role['id']
                         print(f"Deleting role: {role_id}")
-                        delete_url = f"https://discord.com/api/v10/guilds/{guild_id}/roles/{role_id}"
-                        response = requests.delete(delete_url, headers=headers)
-                        response.raise_for_status()
+                        discord_request('DELETE', f"/guilds/{guild_id}/roles/{role_id}", bot_token)
                         role_deleted = True
                         break
                 
@@ -459,6 +500,289 @@ def lambda_handler(event, context):
                         }
                     })
                 }
+        
+        elif command_name == 'sync-campaign':
+            # Campaign name is optional; without it every campaign is synced
+            options = body_json.get('data', {}).get('options', [])
+            campaign_name = None
+            for option in options:
+                if option.get('name') == 'name':
+                    campaign_name = option.get('value')
+                    break
+            
+            print(f"Executing /sync-campaign command for: {campaign_name or 'all campaigns'}")
+            
+            # Get guild ID
+            guild_id = body_json.get('guild_id')
+            if not guild_id:
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': '❌ This command can only be used in a server!',
+                            'flags': 64
+                        }
+                    })
+                }
+            
+            queue_url = os.environ.get('SQS_QUEUE_URL')
+            
+            try:
+                # The worker fetches the guild once, diffs and applies the changes
+                message = {
+                    'task_type': 'sync_campaign',
+                    'application_id': body_json.get('application_id'),
+                    'interaction_token': body_json.get('token'),
+                    'guild_id': guild_id,
+                    'campaign_name': campaign_name
+                }
+                
+                send_task(queue_url, message)
+                print(f"Queued sync task")
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': 5  # DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+                    })
+                }
+                
+            except Exception as e:
+                print(f"ERROR queuing campaign sync: {str(e)}")
+                import traceback
+                print(f"Traceback: {traceback.format_exc()}")
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': f'❌ **Failed to sync campaign: {campaign_name or "all campaigns"}**\n\nError: {str(e)}',
+                            'flags': 64
+                        }
+                    })
+                }
+        
+        elif command_name == 'add-campaign-members':
+            # Extract options
+            options = body_json.get('data', {}).get('options', [])
+            campaign_name = None
+            users_text = None
+            source_role_id = None
+            for option in options:
+                if option.get('name') == 'name':
+                    campaign_name = option.get('value')
+                elif option.get('name') == 'users':
+                    users_text = option.get('value')
+                elif option.get('name') == 'from_role':
+                    source_role_id = option.get('value')
+            
+            user_ids = parse_user_ids(users_text)
+            
+            if not campaign_name or not (user_ids or source_role_id):
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': '❌ Campaign name and at least one user or a role to copy are required!',
+                            'flags': 64
+                        }
+                    })
+                }
+            
+            print(f"Executing /add-campaign-members command for: {campaign_name}")
+            print(f"Users: {len(user_ids)}, copy from role: {source_role_id}")
+            
+            # Get guild ID
+            guild_id = body_json.get('guild_id')
+            if not guild_id:
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': '❌ This command can only be used in a server!',
+                            'flags': 64
+                        }
+                    })
+                }
+            
+            queue_url = os.environ.get('SQS_QUEUE_URL')
+            
+            try:
+                # The worker resolves the role and assigns members in parallel
+                message = {
+                    'task_type': 'add_members',
+                    'application_id': body_json.get('application_id'),
+                    'interaction_token': body_json.get('token'),
+                    'guild_id': guild_id,
+                    'campaign_name': campaign_name,
+                    'user_ids': user_ids,
+                    'source_role_id': source_role_id
+                }
+                
+                send_task(queue_url, message)
+                print(f"Queued member assignment task")
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': 5  # DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+                    })
+                }
+                
+            except Exception as e:
+                print(f"ERROR queuing member assignment: {str(e)}")
+                import traceback
+                print(f"Traceback: {traceback.format_exc()}")
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': f'❌ **Failed to add members to campaign: {campaign_name}**\n\nError: {str(e)}',
+                            'flags': 64
+                        }
+                    })
+                }
+        
+        elif command_name == 'archive-campaign':
+            # Extract options
+            options = body_json.get('data', {}).get('options', [])
+            campaign_name = None
+            archive = True
+            for option in options:
+                if option.get('name') == 'name':
+                    campaign_name = option.get('value')
+                elif option.get('name') == 'unarchive':
+                    archive = not option.get('value')
+            
+            if not campaign_name:
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': '❌ Campaign name is required!',
+                            'flags': 64
+                        }
+                    })
+                }
+            
+            action = 'archive' if archive else 'unarchive'
+            print(f"Executing /archive-campaign command ({action}) for: {campaign_name}")
+            
+            # Get guild ID
+            guild_id = body_json.get('guild_id')
+            if not guild_id:
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': '❌ This command can only be used in a server!',
+                            'flags': 64
+                        }
+                    })
+                }
+            
+            bot_token = get_bot_token(guild_id)
+            
+            try:
+                # Fetch, overwrite edit, bulk position update, re-fetch, plus one edit
+                # per channel that did not sync with the category
+                result = archive_campaign(guild_id, campaign_name, bot_token, archive=archive)
+                
+                if result is None:
+                    content = f'❌ **Campaign not found: {campaign_name}**\n\nNo category with that name exists.'
+                elif not result['changed']:
+                    content = f'ℹ️ **{campaign_name}** is already {action}d.'
+                elif archive:
+                    content = (
+                        f"📦 **Campaign Archived: {campaign_name}**\n\n"
+                        f"Locked posting in {result['channels'] - len(result['failed'])} of "
+                        f"{result['channels']} channels and moved the category to the bottom.\n"
+                    )
+                    if result['failed']:
+                        content += f"⚠️ Could not lock: {', '.join(result['failed'])}. Run the command again to retry.\n"
+                    content += f"Use `/archive-campaign name:{campaign_name} unarchive:True` to restore it."
+                else:
+                    content = (
+                        f"📂 **Campaign Unarchived: {campaign_name}**\n\n"
+                        f"Restored posting in {result['channels'] - len(result['failed'])} of "
+                        f"{result['channels']} channels."
+                    )
+                    if result['failed']:
+                        content += f"\n⚠️ Could not unlock: {', '.join(result['failed'])}. Run the command again to retry."
+                    if not result['restored']:
+                        content += (
+                            "\n⚠️ No archive record in the audit log, so permissions explicitly allowed "
+                            "before archiving were not restored."
+                        )
+                
+                print(f"Campaign {action} complete!")
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': content
+                        }
+                    })
+                }
+                
+            except Exception as e:
+                print(f"ERROR in campaign {action}: {str(e)}")
+                import traceback
+                print(f"Traceback: {traceback.format_exc()}")
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json'
+                    },
+                    'body': json.dumps({
+                        'type': InteractionResponseType.CHANNEL_MESSAGE_WITH_SOURCE,
+                        'data': {
+                            'content': f'❌ **Failed to {action} campaign: {campaign_name}**\n\nError: {str(e)}',
+                            'flags': 64
+                        }
+                    })
+                }
     
     # Default response for unknown interactions
     print(f"Unknown interaction type or command. Body: {body_json}")
@@ -0,0 +1,340 @@
+"""
+Campaign Archiving
+Locks a campaign read-only with a constant number of API calls
+
+Archiving edits the category's permission overwrites once, then sends a
+single bulk channel-position update that moves the category to the bottom
+of the channel list and asks Discord to re-sync every child channel with its
+parent (lock_permissions). Unarchiving reverses both.
+
+Discord does not apply category overwrites to children at runtime, and only
+documents lock_permissions for channels moved to a new parent. So the
+channel list is fetched again afterwards, and any child whose overwrites do
+not match the category is locked (or unlocked) with its own PATCH. That is
+four calls when the sync took effect, plus one per child that did not.
+
+Archiving clears explicit allows and adds denies. The bits it changed are
+written to the audit log reason of each PATCH, and unarchiving reads them
+back (one audit log fetch) to restore exactly those bits. If the record is
+gone (no View Audit Log permission, or older than Discord keeps), the
+archive denies are simply cleared.
+"""
+import requests
+from channelwright.discord_api import discord_request, run_concurrently
+from channelwright.token_pool import get_bot_token
+
+# Permission bits denied to every role while a campaign is archived
+SEND_MESSAGES = 1 << 11
+ADD_REACTIONS = 1 << 6
+CONNECT = 1 << 20
+SPEAK = 1 << 21
+CREATE_PUBLIC_THREADS = 1 << 35
+CREATE_PRIVATE_THREADS = 1 << 36
+SEND_MESSAGES_IN_THREADS = 1 << 38
+
+ARCHIVE_DENY = (
+    SEND_MESSAGES | ADD_REACTIONS | CONNECT | SPEAK |
+    CREATE_PUBLIC_THREADS | CREATE_PRIVATE_THREADS | SEND_MESSAGES_IN_THREADS
+)
+
+# Audit log reasons written by archiving start with this
+ARCHIVE_REASON_PREFIX = 'Channelwright archive'
+
+# Discord's limit on X-Audit-Log-Reason
+MAX_REASON_LENGTH = 512
+
+# Audit log pages (100 entries each) searched for archive records
+AUDIT_LOG_PAGES = 5
+
+
+def is_archived(category):
+    """
+    Return True if every role overwrite on the category denies posting
+    """
+    role_overwrites = [
+        ow for ow in category.get('permission_overwrites', [])
+        if ow.get('type') == 0
+    ]
+    return bool(role_overwrites) and all(
+        int(ow.get('deny', 0)) & SEND_MESSAGES for ow in role_overwrites
+    )
+
+
+def build_archive_overwrites(channel, archive, restore=None):
+    """
+    Return a channel's permission overwrites with posting locked or unlocked
+    Viewing is left untouched, so campaign members can still read the archive
+    restore is the record from build_archive_reason; unarchiving puts back
+    exactly the allow/deny bits it saved, and drops overwrites archiving added
+    """
+    restore = restore or {'bits': {}, 'added': []}
+    overwrites = []
+    for ow in channel.get('permission_overwrites', []):
+        if not archive and ow['id'] in restore['added']:
+            continue
+        allow = int(ow.get('allow', 0))
+        deny = int(ow.get('deny', 0))
+        if archive:
+            allow &= ~ARCHIVE_DENY
+            deny |= ARCHIVE_DENY
+        else:
+            saved_allow, saved_deny = restore['bits'].get(ow['id'], (0, 0))
+            allow |= saved_allow
+            deny = (deny & ~ARCHIVE_DENY) | saved_deny
+        overwrites.append({
+            'id': ow['id'],
+            'type': ow['type'],
+            'allow': str(allow),
+            'deny': str(deny)
+        })
+    return overwrites
+
+
+def build_archive_reason(channel, added=()):
+    """
+    Build the audit log reason for archiving a channel
+    Records the archive bits each overwrite explicitly allowed or denied,
+    and the overwrites archiving added, as "id:allow:deny" and "+id" entries
+    """
+    entries = []
+    for ow in channel.get('permission_overwrites', []):
+        saved_allow = int(ow.get('allow', 0)) & ARCHIVE_DENY
+        saved_deny = int(ow.get('deny', 0)) & ARCHIVE_DENY
+        if saved_allow or saved_deny:
+            entries.append(f"{ow['id']}:{saved_allow}:{saved_deny}")
+    entries.extend(f"+{ow_id}" for ow_id in added)
+
+    reason = ARCHIVE_REASON_PREFIX
+    for idx, entry in enumerate(entries):
+        if len(reason) + len(entry) + 1 > MAX_REASON_LENGTH:
+            print(f"Archive record for channel {channel['id']} too long, {len(entries) - idx} entries not saved")
+            break
+        reason += (' ' if reason == ARCHIVE_REASON_PREFIX else ',') + entry
+    return reason
+
+
+def parse_archive_reason(reason):
+    """
+    Parse an audit log reason written by build_archive_reason
+    Returns {'bits': {overwrite_id: (allow, deny)}, 'added': [overwrite_id]}
+    """
+    restore = {'bits': {}, 'added': []}
+    entries = reason[len(ARCHIVE_REASON_PREFIX):].strip()
+    for entry in filter(None, entries.split(',')):
+        if entry.startswith('+'):
+            restore['added'].append(entry[1:])
+        else:
+            ow_id, allow, deny = entry.split(':')
+            restore['bits'][ow_id] = (int(allow), int(deny))
+    return restore
+
+
+def find_archive_records(guild_id, category_id, bot_token):
+    """
+    Find the newest archive record for the category and its channels
+    Archive PATCHes the category before its channels, so the search stops at
+    the category's record (newest first)
+    Returns {channel_id: restore}; empty if the audit log cannot be read
+    """
+    records = {}
+    before = None
+    try:
+        for _ in range(AUDIT_LOG_PAGES):
+            path = f"/guilds/{guild_id}/audit-logs?limit=100"
+            if before:
+                path += f"&before={before}"
+            entries = discord_request('GET', path, bot_token).get('audit_log_entries', [])
+            for entry in entries:
+                reason = entry.get('reason') or ''
+                target_id = entry.get('target_id')
+                if not reason.startswith(ARCHIVE_REASON_PREFIX) or target_id in records:
+                    continue
+                records[target_id] = parse_archive_reason(reason)
+                if target_id == category_id:
+                    return records
+            if len(entries) < 100:
+                break
+            before = entries[-1]['id']
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error reading archive records from the audit log: {e}")
+        return {}
+    print(f"No archive record found for category {category_id}")
+    return records
+
+
+def get_added_overwrites(child, category):
+    """
+    Return the category overwrites for roles a child has no overwrite for
+    """
+    own_ids = {ow['id'] for ow in child.get('permission_overwrites', [])}
+    return [ow for ow in category.get('permission_overwrites', []) if ow['id'] not in own_ids]
+
+
+def build_child_overwrites(child, category, archive, restore=None):
+    """
+    Return a child's overwrites locked or unlocked like its category's
+    The child's own overwrites (e.g. a GM-only channel's) are kept; when
+    archiving, roles the category covers but the child does not are added
+    """
+    overwrites = build_archive_overwrites(child, archive, restore)
+    if archive:
+        overwrites.extend(get_added_overwrites(child, category))
+    return overwrites
+
+
+def is_synced(child, category):
+    """
+    Return True if a child's overwrites match its category's exactly
+    """
+    def key(channel):
+        return sorted(
+            (ow['id'], ow.get('type'), str(ow.get('allow', 0)), str(ow.get('deny', 0)))
+            for ow in channel.get('permission_overwrites', [])
+        )
+    return key(child) == key(category)
+
+
+def child_needs_update(child, category, archive):
+    """
+    Return True if a child is not yet locked (or unlocked) like its category
+    category must already have its archived (or unarchived) overwrites
+    """
+    if is_synced(child, category):
+        return False
+    if not archive:
+        return is_archived(child)
+    own_ids = {ow['id'] for ow in child.get('permission_overwrites', [])}
+    covers_category = all(
+        ow['id'] in own_ids for ow in category.get('permission_overwrites', [])
+    )
+    return not (covers_category and is_archived(child))
+
+
+def build_category_moves(category, all_channels, archive):
+    """
+    Build the position updates that move a category into or out of the archive
+    Archived categories go to the bottom; unarchived ones move back above them
+    Returns an empty list if the category is already in place
+    """
+    categories = sorted(
+        (ch for ch in all_channels if ch.get('type') == 4),
+        key=lambda c: (c.get('position', 0), int(c['id']))
+    )
+    moves = []
+
+    if archive:
+        bottom = max((c.get('position', 0) for c in categories), default=0)
+        if categories and categories[-1]['id'] != category['id']:
+            moves.append({'id': category['id'], 'position': bottom + 1})
+    else:
+        archived = [
+            c for c in categories
+            if c['id'] != category['id'] and is_archived(c)
+        ]
+        if archived and category.get('position', 0) >= archived[0].get('position', 0):
+            # Take the first archived slot and shift the archive block down
+            moves.append({'id': category['id'], 'position': archived[0].get('position', 0)})
+            for c in archived:
+                moves.append({'id': c['id'], 'position': c.get('position', 0) + 1})
+    return moves
+
+
+def build_archive_positions(category, all_channels, archive):
+    """
+    Build the bulk position payload for archiving or unarchiving a category
+    Every child is re-synced with the category's permissions
+    """
+    updates = build_category_moves(category, all_channels, archive)
+    for ch in all_channels:
+        if ch.get('parent_id') == category['id']:
+            updates.append({'id': ch['id'], 'parent_id': category['id'], 'lock_permissions': True})
+    return updates
+
+
+def update_unsynced_children(guild_id, category, all_channels, archive, records):
+    """
+    Lock (or unlock) each child that did not follow its category, in parallel
+    records holds the archive records used to restore children on unarchive
+    Returns (updated, failed) lists of channel names
+    """
+    pending = [
+        ch for ch in all_channels
+        if ch.get('parent_id') == category['id'] and child_needs_update(ch, category, archive)
+    ]
+    if not pending:
+        return [], []
+
+    print(f"{len(pending)} channel(s) did not sync with the category, updating them individually")
+    def update(child):
+        if archive:
+            added = [ow['id'] for ow in get_added_overwrites(child, category)]
+            reason = build_archive_reason(child, added)
+        else:
+            reason = None
+        return discord_request('PATCH', f"/channels/{child['id']}", get_bot_token(guild_id), {
+            'permission_overwrites': build_child_overwrites(child, category, archive, records.get(child['id']))
+        }, reason=reason)
+
+    outcomes = run_concurrently([lambda ch=ch: update(ch) for ch in pending])
+    updated, failed = [], []
+    for ch, (_, error) in zip(pending, outcomes):
+        if error:
+            print(f"Error updating channel {ch['name']}: {error}")
+            failed.append(ch['name'])
+        else:
+            updated.append(ch['name'])
+    return updated, failed
+
+
+def archive_campaign(guild_id, campaign_name, bot_token, archive=True):
+    """
+    Archive (or unarchive) a campaign category and all of its channels
+    Safe to retry: a step that already happened (overwrites, move or a
+    child's lock) is not treated as the whole operation having happened
+    Returns a dict describing the result, or None if the campaign is missing
+    """
+    all_channels = discord_request('GET', f"/guilds/{guild_id}/channels", bot_token)
+    category = next(
+        (ch for ch in all_channels if ch.get('type') == 4 and ch.get('name') == campaign_name),
+        None
+    )
+    if not category:
+        return None
+
+    children = [ch for ch in all_channels if ch.get('parent_id') == category['id']]
+    result = {
+        'category_id': category['id'],
+        'channels': len(children),
+        'changed': False,
+        'updated': [],
+        'failed': [],
+        'restored': True
+    }
+    overwrites_done = is_archived(category) == archive
+    if (overwrites_done
+            and not build_category_moves(category, all_channels, archive)
+            and not any(child_needs_update(ch, category, archive) for ch in children)):
+        return result
+
+    print(f"{'Archiving' if archive else 'Unarchiving'} category {category['id']} with {len(children)} channels")
+    records = {} if archive else find_archive_records(guild_id, category['id'], bot_token)
+    if not archive and not overwrites_done:
+        result['restored'] = category['id'] in records
+    if not overwrites_done:
+        discord_request('PATCH', f"/channels/{category['id']}", bot_token, {
+            'permission_overwrites': build_archive_overwrites(category, archive, records.get(category['id']))
+        }, reason=build_archive_reason(category) if archive else None)
+
+    updates = build_archive_positions(category, all_channels, archive)
+    if updates:
+        discord_request('PATCH', f"/guilds/{guild_id}/channels", bot_token, updates)
+
+    # Check which children actually followed the category
+    all_channels = discord_request('GET', f"/guilds/{guild_id}/channels", bot_token)
+    category = next((ch for ch in all_channels if ch['id'] == category['id']), category)
+    result['updated'], result['failed'] = update_unsynced_children(
+        guild_id, category, all_channels, archive, records
+    )
+
+    result['changed'] = True
+    return result
@@ -17,21 +17,38 @@ def get_channel_type_name(channel_type):
     }
     return type_map.get(channel_type, 'Unknown')
 
+
+def get_channel_topic(channel_config):
+    """
+    Build the channel topic for a channel configuration
+    Returns None for channel types without a topic
+    """
+    if channel_config['type'] not in [0, 15] or not channel_config.get('description'):
+        return None
+    
+    description = channel_config['description']
+    # Add GM-only note to description
+    if channel_config.get('gm_only'):
+        description = f"🔒 GM ONLY - {description}\n\n⚠️ Admins: Please manually restrict this channel to GMs only."
+    return description
+
 def load_campaign_channels():
     """
     Load campaign channel configuration from YAML file
     Returns list of channel configurations
     """
-    # Try to load from config directory
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'campaign_channels.yaml')
-    
-    # For Lambda, config is in the deployment package
-    if not os.path.exists(config_path):
-        config_path = os.path.join(os.path.dirname(__file__), 'config', 'campaign_channels.yaml')
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    candidates = [
+        # Next to the package (src/config)
+        os.path.join(module_dir, '..', 'config', 'campaign_channels.yaml'),
+        # Repository root, wherever the process was started (e.g. uvicorn in src/)
+        os.path.join(module_dir, '..', '..', 'config', 'campaign_channels.yaml'),
+        # For Lambda, config is in the deployment package
+        os.path.join(module_dir, 'config', 'campaign_channels.yaml')
+    ]
     
     # If still not found, try relative to current directory
-    if not os.path.exists(config_path):
-        config_path = 'config/campaign_channels.yaml'
+    config_path = next((path for path in candidates if os.path.exists(path)), 'config/campaign_channels.yaml')
     
     try:
         with open(config_path, 'r') as f:
@@ -50,7 +67,8 @@ def load_campaign_channels():
                 discord_channels.append({
                     'name': channel['name'],
                     'type': channel_type,
-                    'gm_only': channel.get('gm_only', False)
+                    'gm_only': channel.get('gm_only', False),
+                    'description': channel.get('description', '')
                 })
             
             return discord_channels
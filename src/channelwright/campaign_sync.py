@@ -0,0 +1,137 @@
+"""
+Campaign Template Sync
+Computes the difference between the channel template and existing campaigns
+"""
+from channelwright.campaign_config import get_channel_topic
+from channelwright.discord_api import discord_request
+
+# Voice channels are ordered separately from text/forum channels in Discord
+VOICE_CHANNEL_TYPES = (2, 13)
+
+
+def get_guild_channels(guild_id, bot_token):
+    """
+    Fetch all channels in a guild
+    Fetched fresh for every task, since members may edit channels at any time
+    """
+    return discord_request('GET', f"/guilds/{guild_id}/channels", bot_token)
+
+
+def find_campaigns(all_channels, roles, campaign_name=None):
+    """
+    Find campaign categories that have a matching "<name> Members" role
+    Returns a list of (category, role) tuples
+    """
+    roles_by_name = {role.get('name'): role for role in roles}
+    campaigns = []
+    for channel in all_channels:
+        if channel.get('type') != 4:
+            continue
+        if campaign_name is not None and channel.get('name') != campaign_name:
+            continue
+        role = roles_by_name.get(f"{channel.get('name')} Members")
+        if role:
+            campaigns.append((channel, role))
+    return campaigns
+
+
+def _sort_group(channel_type):
+    """
+    Return the ordering group for a channel type
+    """
+    return 'voice' if channel_type in VOICE_CHANNEL_TYPES else 'text'
+
+
+def diff_campaign(template, category, all_channels):
+    """
+    Compare a campaign category against the channel template
+    Returns a dict with the channels to create, topics to patch and
+    whether the channels need to be reordered
+    """
+    children = [ch for ch in all_channels if ch.get('parent_id') == category['id']]
+    children_by_name = {ch.get('name'): ch for ch in children}
+    template_names = {ch['name'] for ch in template}
+
+    diff = {
+        'create': [],
+        'update': [],
+        'mismatched': [],
+        'extra': sorted(name for name in children_by_name if name not in template_names),
+        'reorder': False
+    }
+
+    for channel_config in template:
+        existing = children_by_name.get(channel_config['name'])
+        if existing is None:
+            diff['create'].append(channel_config)
+            continue
+
+        if existing.get('type') != channel_config['type']:
+            # Discord cannot convert between text, voice and forum channels
+            diff['mismatched'].append(channel_config['name'])
+            continue
+
+        topic = get_channel_topic(channel_config)
+        if topic is not None and (existing.get('topic') or '') != topic:
+            diff['update'].append({
+                'id': existing['id'],
+                'name': existing['name'],
+                'changes': {'topic': topic}
+            })
+
+    # Compare the current order of template channels within each ordering group
+    for group in ('text', 'voice'):
+        expected = [
+            ch['name'] for ch in template
+            if _sort_group(ch['type']) == group and ch['name'] in children_by_name
+        ]
+        current = [
+            ch.get('name') for ch in sorted(children, key=lambda c: (c.get('position', 0), int(c['id'])))
+            if _sort_group(ch.get('type')) == group and ch.get('name') in template_names
+        ]
+        if expected != current:
+            diff['reorder'] = True
+
+    # Newly created channels are appended in the order their (parallel)
+    # creates finish, so order only holds for a single new channel that goes last
+    if diff['create'] and not diff['reorder']:
+        created_names = {ch['name'] for ch in diff['create']}
+        for group in ('text', 'voice'):
+            names = [ch['name'] for ch in template if _sort_group(ch['type']) == group]
+            created_in_group = [i for i, name in enumerate(names) if name in created_names]
+            if len(created_in_group) > 1:
+                diff['reorder'] = True
+            elif created_in_group and any(name not in created_names for name in names[created_in_group[0]:]):
+                diff['reorder'] = True
+
+    return diff
+
+
+def build_position_updates(template, category, all_channels):
+    """
+    Build the bulk channel position payload that puts a category's
+    channels in template order (channels not in the template go last)
+    """
+    children = [ch for ch in all_channels if ch.get('parent_id') == category['id']]
+    template_order = {ch['name']: idx for idx, ch in enumerate(template)}
+
+    updates = []
+    for group in ('text', 'voice'):
+        group_children = [ch for ch in children if _sort_group(ch.get('type')) == group]
+        if not group_children:
+            continue
+        base = min(ch.get('position', 0) for ch in group_children)
+        ordered = sorted(
+            group_children,
+            key=lambda c: (template_order.get(c.get('name'), len(template_order)), c.get('position', 0), int(c['id']))
+        )
+        for offset, channel in enumerate(ordered):
+            updates.append({'id': channel['id'], 'position': base + offset})
+    return updates
+
+
+def is_empty_diff(diff):
+    """
+    Return True if a campaign already matches the template
+    """
+    return not (diff['create'] or diff['update'] or diff['reorder'])
@@ -0,0 +1,196 @@
+"""
+Discord REST API Client
+HTTP sessions and rate limit tracking per bot token and route
+"""
+import time
+import threading
+import contextvars
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from channelwright.tracing import span
+
+DISCORD_API_BASE = "https://discord.com/api/v10"
+
+# Path segments whose following ID is a Discord "major parameter"
+# (rate limits are tracked separately per guild/channel/webhook)
+MAJOR_PARAMETER_SEGMENTS = ('guilds', 'channels', 'webhooks')
+
+# Default number of Discord calls issued at once by run_concurrently
+DEFAULT_MAX_WORKERS = 5
+
+_lock = threading.Lock()
+
+# bot_token -> requests session (each bot identity keeps its own connection pool)
+_sessions = {}
+
+# (bot_token, route) -> {'remaining': int, 'reset_at': float}
+_route_limits = {}
+
+# bot_token -> monotonic time until which its global rate limit is exhausted
+_global_reset_at = {}
+
+# bot_token -> number of requests currently being sent
+_in_flight = {}
+
+
+def get_session(bot_token=None):
+    """
+    Return the session for a bot token (reuses connections across calls)
+    """
+    with _lock:
+        session = _sessions.get(bot_token)
+        if session is None:
+            session = _sessions[bot_token] = requests.Session()
+        return session
+
+
+def get_token_load(bot_token):
+    """
+    Return (seconds until the token's global limit resets, requests in flight)
+    Used to balance work across a pool of bot tokens
+    """
+    with _lock:
+        wait = max(0.0, _global_reset_at.get(bot_token, 0.0) - time.monotonic())
+        return wait, _in_flight.get(bot_token, 0)
+
+
+def get_route_key(method, path):
+    """
+    Build a rate limit route key from an API path
+    Keeps major parameter IDs, collapses all other IDs and drops the query
+    """
+    segments = path.split('?')[0].strip('/').split('/')
+    route = []
+    for idx, segment in enumerate(segments):
+        previous = segments[idx - 1] if idx > 0 else None
+        if previous in MAJOR_PARAMETER_SEGMENTS:
+            route.append(segment)
+        elif previous is not None and idx >= 2 and segments[idx - 2] == 'webhooks':
+            route.append(segment)  # Webhook token is part of the major parameter
+        elif segment.isdigit():
+            route.append(':id')
+        else:
+            route.append(segment)
+    return f"{method.upper()} /{'/'.join(route)}"
+
+
+def redact_route(route):
+    """
+    Hide the interaction token in webhook routes before logging them
+    """
+    parts = route.split('/')
+    if len(parts) > 3 and parts[1] == 'webhooks':
+        parts[3] = ':token'
+    return '/'.join(parts)
+
+
+def _wait_for_route(bot_token, route):
+    """
+    Block until the route (and the token's global limit) has capacity
+    """
+    while True:
+        with _lock:
+            now = time.monotonic()
+            wait = max(0.0, _global_reset_at.get(bot_token, 0.0) - now)
+            limit = _route_limits.get((bot_token, route))
+            if limit and limit['remaining'] <= 0 and limit['reset_at'] > now:
+                wait = max(wait, limit['reset_at'] - now)
+            if wait <= 0:
+                if limit:
+                    limit['remaining'] -= 1
+                return
+        time.sleep(wait)
+
+
+def _update_route_limit(bot_token, route, response):
+    """
+    Record rate limit headers returned by Discord for the route
+    """
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    reset_after = response.headers.get('X-RateLimit-Reset-After')
+    if remaining is None or reset_after is None:
+        return
+    with _lock:
+        _route_limits[(bot_token, route)] = {
+            'remaining': int(remaining),
+            'reset_at': time.monotonic() + float(reset_after)
+        }
+
+
+def _handle_rate_limited(bot_token, route, response):
+    """
+    Record a 429 response and return the number of seconds to back off
+    """
+    try:
+        data = response.json()
+    except ValueError:
+        data = {}
+    retry_after = float(data.get('retry_after') or response.headers.get('Retry-After') or 1)
+    reset_at = time.monotonic() + retry_after
+    with _lock:
+        if data.get('global') or response.headers.get('X-RateLimit-Global'):
+            _global_reset_at[bot_token] = max(_global_reset_at.get(bot_token, 0.0), reset_at)
+        else:
+            _route_limits[(bot_token, route)] = {'remaining': 0, 'reset_at': reset_at}
+    return retry_after
+
+
+def discord_request(method, path, bot_token=None, payload=None, max_retries=3, reason=None):
+    """
+    Call the Discord API, waiting for rate limits and retrying on 429
+    reason is recorded in the guild's audit log with the change
+    Returns the decoded JSON body (None for empty responses)
+    """
+    url = f"{DISCORD_API_BASE}{path}"
+    headers = {
+        "Content-Type": "application/json"
+    }
+    if bot_token:
+        headers["Authorization"] = f"Bot {bot_token}"
+    if reason:
+        headers["X-Audit-Log-Reason"] = quote(reason)
+
+    route = get_route_key(method, path)
+    session = get_session(bot_token)
+    with span('discord', route=redact_route(route)) as span_attrs:
+        for attempt in range(max_retries + 1):
+            _wait_for_route(bot_token, route)
+            with _lock:
+                _in_flight[bot_token] = _in_flight.get(bot_token, 0) + 1
+            try:
+                response = session.request(method, url, json=payload, headers=headers)
+            finally:
+                with _lock:
+                    _in_flight[bot_token] -= 1
+            _update_route_limit(bot_token, route, response)
+            span_attrs.update(status=response.status_code, attempts=attempt + 1)
+
+            if response.status_code == 429 and attempt < max_retries:
+                retry_after = _handle_rate_limited(bot_token, route, response)
+                print(f"Rate limited on {redact_route(route)}, retrying in {retry_after:.2f}s")
+                continue
+
+            response.raise_for_status()
+            if response.status_code == 204 or not response.content:
+                return None
+            return response.json()
+
+
+def run_concurrently(tasks, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Run callables in parallel, each in a copy of the caller's trace context
+    Returns a list of (result, error) tuples in the same order as tasks
+    """
+    def run(task, context):
+        try:
+            return context.run(task), None
+        except Exception as e:
+            return None, e
+
+    if not tasks:
+        return []
+    # A context can only be entered by one thread at a time, so copy per task
+    contexts = [contextvars.copy_context() for _ in tasks]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        return list(executor.map(run, tasks, contexts))
@@ -0,0 +1,142 @@
+"""
+On-Demand Profiling
+Samples Lambda invocations with cProfile and tracemalloc
+
+Controlled by environment variables read at cold start:
+    CHANNELWRIGHT_PROFILE_RATE    Share of invocations to profile, 0.0-1.0 (default 0 = off)
+    CHANNELWRIGHT_PROFILE_OUTPUT  'log' (default) or a directory such as /tmp for .prof files
+    CHANNELWRIGHT_PROFILE_TOP     Functions listed in the log summary (default 15)
+
+With the rate at 0 the handler is returned unwrapped, so there is no
+per-invocation cost. cpu_ms is process CPU time (one invocation per
+process on Lambda), and cProfile only sees the handler's own thread.
+Sampled invocations write a one-line summary:
+
+    PROFILE {"handler": "worker", "wall_ms": 812.4, "cpu_ms": 95.1, "peak_kb": 2210.5, "top": [...]}
+"""
+import os
+import io
+import json
+import time
+import uuid
+import random
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from functools import wraps
+from channelwright.tracing import get_trace_id
+
+PROFILE_LOG_PREFIX = 'PROFILE '
+
+
+def read_number(name, default, cast):
+    """
+    Read a numeric setting, falling back to the default if it is malformed
+    A typo must not stop the handler module from importing
+    """
+    raw = os.environ.get(name)
+    if not raw:
+        return default
+    try:
+        return cast(raw)
+    except ValueError:
+        print(f"Invalid {name} value {raw!r}, using {default}")
+        return default
+
+
+PROFILE_RATE = read_number('CHANNELWRIGHT_PROFILE_RATE', 0.0, float)
+PROFILE_OUTPUT = os.environ.get('CHANNELWRIGHT_PROFILE_OUTPUT', 'log')
+PROFILE_TOP = read_number('CHANNELWRIGHT_PROFILE_TOP', 15, int)
+
+# tracemalloc is process-wide; only one sampled invocation may own it
+_tracemalloc_lock = threading.Lock()
+
+
+def summarize_profile(profiler, top=PROFILE_TOP):
+    """
+    Return the top functions by cumulative time as compact rows
+    """
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats('cumulative')
+    rows = []
+    for func in stats.fcn_list[:top]:
+        primitive_calls, total_calls, own_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            'func': f"{os.path.basename(filename)}:{line}:{name}",
+            'calls': total_calls,
+            'own_ms': round(own_time * 1000, 2),
+            'cum_ms': round(cumulative_time * 1000, 2)
+        })
+    return rows
+
+
+def write_profile(handler_name, profiler, summary, context):
+    """
+    Write the profile summary to the log and, if configured, a .prof file
+    """
+    if PROFILE_OUTPUT != 'log':
+        # The random suffix keeps concurrent server requests (no context) apart
+        request_id = getattr(context, 'aws_request_id', None) or str(int(time.time() * 1000))
+        path = os.path.join(PROFILE_OUTPUT, f"profile-{handler_name}-{request_id}-{uuid.uuid4().hex[:8]}.prof")
+        try:
+            profiler.dump_stats(path)
+            summary['file'] = path
+        except OSError as e:
+            print(f"Error writing profile to {path}: {e}")
+    # One write per line so concurrent output does not interleave
+    print(PROFILE_LOG_PREFIX + json.dumps(summary) + '\n', end='')
+
+
+def profiled(handler_name, rate=None):
+    """
+    Decorator that profiles a sampled share of handler invocations
+    """
+    rate = PROFILE_RATE if rate is None else rate
+
+    def decorator(handler):
+        if rate <= 0:
+            return handler
+
+        @wraps(handler)
+        def wrapper(event, context):
+            if random.random() >= rate:
+                return handler(event, context)
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active (e.g. a concurrent server request)
+                return handler(event, context)
+
+            owns_tracemalloc = _tracemalloc_lock.acquire(blocking=False)
+            if owns_tracemalloc:
+                tracemalloc.start()
+            wall_started = time.perf_counter()
+            cpu_started = time.process_time()
+            try:
+                return handler(event, context)
+            finally:
+                profiler.disable()
+                wall_ms = (time.perf_counter() - wall_started) * 1000
+                cpu_ms = (time.process_time() - cpu_started) * 1000
+                peak_kb = None
+                if owns_tracemalloc:
+                    peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+                    tracemalloc.stop()
+                    _tracemalloc_lock.release()
+                summary = {
+                    'handler': handler_name,
+                    'trace_id': get_trace_id(),
+                    'wall_ms': round(wall_ms, 1),
+                    'cpu_ms': round(cpu_ms, 1),
+                    'peak_kb': peak_kb,
+                    'top': summarize_profile(profiler)
+                }
+                write_profile(handler_name, profiler, summary, context)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,130 @@
+"""
+Channelwright ASGI Server
+Long-running HTTP entry point for Discord interactions
+
+Run with any ASGI server, e.g.:
+    uvicorn channelwright.server:app --host 0.0.0.0 --port 8000
+
+Each request is translated into the API Gateway event shape and handled by
+the same code as the Lambda (channelwright.bot.lambda_handler). The Discord
+session, rate limit state, public key and channel template are module-level,
+so they live for the whole process instead of one Lambda container.
+"""
+import os
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from channelwright.bot import lambda_handler
+
+# Interactions handled at once; blocking Discord calls run on these threads
+SERVER_MAX_WORKERS = int(os.environ.get('SERVER_MAX_WORKERS', '32'))
+
+# Largest interaction body accepted (Discord payloads are a few KB)
+MAX_BODY_BYTES = 1024 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=SERVER_MAX_WORKERS, thread_name_prefix='interaction')
+
+
+async def read_body(receive):
+    """
+    Read the full request body from the ASGI receive channel
+    """
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            return None
+        if not message.get('more_body'):
+            return body
+
+
+async def send_response(send, status, body, headers=None):
+    """
+    Send a complete HTTP response
+    """
+    response_headers = [(b'content-type', b'application/json')]
+    for key, value in (headers or {}).items():
+        if key.lower() != 'content-type':
+            response_headers.append((key.lower().encode(), str(value).encode()))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': response_headers
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': body.encode() if isinstance(body, str) else body
+    })
+
+
+async def handle_lifespan(receive, send):
+    """
+    Handle ASGI startup/shutdown events
+    """
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            print(f"Channelwright server started ({SERVER_MAX_WORKERS} workers)")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """
+    ASGI application serving Discord interactions
+    """
+    if scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+        return
+
+    if scope['type'] != 'http':
+        return
+
+    if scope['method'] == 'GET':
+        # Health check for load balancers
+        await send_response(send, 200, json.dumps({'status': 'ok'}))
+        return
+
+    if scope['method'] != 'POST':
+        await send_response(send, 405, json.dumps({'error': 'Method not allowed'}))
+        return
+
+    body = await read_body(receive)
+    if body is None:
+        await send_response(send, 413, json.dumps({'error': 'Request body too large'}))
+        return
+
+    try:
+        body = body.decode('utf-8')
+    except UnicodeDecodeError:
+        # Discord always sends UTF-8 JSON; anything else cannot carry a valid signature
+        await send_response(send, 400, json.dumps({'error': 'Request body is not valid UTF-8'}))
+        return
+
+    event = {
+        'headers': {key.decode('latin-1'): value.decode('latin-1') for key, value in scope['headers']},
+        'body': body
+    }
+
+    # The handler uses blocking HTTP; running it off the event loop keeps a
+    # slow Discord call in one interaction from stalling the others
+    loop = asyncio.get_running_loop()
+    try:
+        response = await loop.run_in_executor(_executor, lambda_handler, event, None)
+    except Exception as e:
+        print(f"ERROR handling interaction: {str(e)}")
+        import traceback
+        print(f"Traceback: {traceback.format_exc()}")
+        await send_response(send, 500, json.dumps({'error': 'Internal server error'}))
+        return
+
+    await send_response(
+        send,
+        response.get('statusCode', 200),
+        response.get('body', ''),
+        response.get('headers')
+    )
@@ -0,0 +1,84 @@
+"""
+Bot Token Pool
+Spreads Discord API load across several bot identities
+
+By default every guild uses DISCORD_BOT_TOKEN. To add more bots, set
+DISCORD_BOT_TOKEN_POOL to JSON naming each token and the bots installed
+in each guild:
+
+    {
+        "tokens": {"main": "<token>", "helper-1": "<token>"},
+        "guilds": {"123456789012345678": ["main", "helper-1"]},
+        "default": ["main"]
+    }
+
+Guilds not listed use "default" (or DISCORD_BOT_TOKEN if it is unset).
+Where a guild has several bots, each call goes to the bot with the most
+headroom, so throughput scales with the number of bots instead of stopping
+at one bot's global rate limit.
+"""
+import os
+import json
+import itertools
+from channelwright.discord_api import get_token_load
+
+_pool = None
+_round_robin = itertools.count()
+
+
+def load_token_pool():
+    """
+    Load the guild-to-token map from the environment
+    Returns a dict with 'guilds' (guild_id -> [tokens]) and 'default' ([tokens])
+    """
+    default_token = os.environ.get('DISCORD_BOT_TOKEN')
+    pool = {
+        'guilds': {},
+        'default': [default_token] if default_token else []
+    }
+
+    raw_pool = os.environ.get('DISCORD_BOT_TOKEN_POOL')
+    if not raw_pool:
+        return pool
+
+    try:
+        config = json.loads(raw_pool)
+        tokens = config.get('tokens', {})
+        if default_token:
+            tokens.setdefault('default', default_token)
+        # Built aside so a bad entry leaves the single-token pool untouched
+        guilds = {
+            str(guild_id): [tokens[name] for name in names]
+            for guild_id, names in config.get('guilds', {}).items()
+        }
+        default = [tokens[name] for name in config['default']] if config.get('default') else pool['default']
+        pool = {'guilds': guilds, 'default': default}
+        print(f"Loaded bot token pool: {len(tokens)} token(s), {len(guilds)} guild mapping(s)")
+    except (ValueError, KeyError, AttributeError) as e:
+        print(f"Error loading DISCORD_BOT_TOKEN_POOL, using DISCORD_BOT_TOKEN only: {e}")
+    return pool
+
+
+def get_guild_tokens(guild_id):
+    """
+    Return every bot token that can act in a guild
+    """
+    global _pool
+    if _pool is None:
+        _pool = load_token_pool()
+    return _pool['guilds'].get(str(guild_id), _pool['default'])
+
+
+def get_bot_token(guild_id=None):
+    """
+    Pick the bot token with the most headroom for a guild
+    Prefers tokens not globally rate limited, then the fewest requests in flight
+    """
+    tokens = get_guild_tokens(guild_id)
+    if len(tokens) <= 1:
+        return tokens[0] if tokens else None
+
+    # Rotate the starting point so ties are spread across tokens
+    offset = next(_round_robin) % len(tokens)
+    rotated = tokens[offset:] + tokens[:offset]
+    return min(rotated, key=get_token_load)
@@ -0,0 +1,80 @@
+"""
+Campaign Tracing
+Correlates bot and worker log lines for one interaction
+
+A trace ID is created when an interaction arrives and carried in every SQS
+message it produces. Spans are written to the log stream as single lines:
+
+    TRACE {"trace_id": "...", "span": "discord", "start": 1700000000.123, "duration_ms": 84.2, ...}
+
+scripts/trace_report.py rebuilds per-campaign timelines from these lines.
+Set CHANNELWRIGHT_TRACING=0 to turn span logging off.
+"""
+import os
+import json
+import time
+import uuid
+import contextvars
+from contextlib import contextmanager
+
+TRACE_LOG_PREFIX = 'TRACE '
+
+TRACING_ENABLED = os.environ.get('CHANNELWRIGHT_TRACING', '1') != '0'
+
+# Current trace attributes (trace_id, campaign_name, guild_id, ...)
+_trace_context = contextvars.ContextVar('trace_context', default={})
+
+
+def new_trace_id(interaction_id=None):
+    """
+    Create a trace ID, reusing the interaction ID when there is one
+    """
+    return str(interaction_id) if interaction_id else uuid.uuid4().hex
+
+
+def set_trace(trace_id, **attrs):
+    """
+    Make trace_id (and attributes such as campaign_name) current for later spans
+    """
+    _trace_context.set({'trace_id': trace_id, **{k: v for k, v in attrs.items() if v is not None}})
+
+
+def get_trace_id():
+    """
+    Return the current trace ID, if any
+    """
+    return _trace_context.get().get('trace_id')
+
+
+def record_span(name, start, end, **attrs):
+    """
+    Write a finished span (start/end are epoch seconds) to the log stream
+    """
+    context = _trace_context.get()
+    if not TRACING_ENABLED or not context.get('trace_id'):
+        return
+    record = {
+        **context,
+        'span': name,
+        'start': round(start, 4),
+        'duration_ms': round((end - start) * 1000, 1),
+        **{k: v for k, v in attrs.items() if v is not None}
+    }
+    # One write per line so spans from parallel threads do not interleave
+    print(TRACE_LOG_PREFIX + json.dumps(record) + '\n', end='')
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block as a span; yields a dict for attributes known only at the end
+    """
+    extra = {}
+    start = time.time()
+    try:
+        yield extra
+    except Exception as e:
+        extra['error'] = type(e).__name__
+        raise
+    finally:
+        record_span(name, start, time.time(), **attrs, **extra)
@@ -2,35 +2,75 @@
 Channel Creation Worker Lambda
 Processes SQS messages to create channels and update progress
 """
-import os
 import json
+import time
 import requests
-from channelwright.campaign_config import get_channel_type_name
+from channelwright.campaign_config import (
+    DEFAULT_CAMPAIGN_CHANNELS,
+    get_channel_type_name,
+    get_channel_topic
+)
+from channelwright.campaign_sync import (
+    get_guild_channels,
+    find_campaigns,
+    diff_campaign,
+    build_position_updates,
+    is_empty_diff
+)
+from channelwright.discord_api import discord_request, run_concurrently
+from channelwright.token_pool import get_bot_token
+from channelwright.profiling import profiled
+from channelwright.tracing import set_trace, record_span, span
+
+# Members assigned between progress updates
+MEMBER_PROGRESS_CHUNK = 10
+
+# Page size for listing guild members (Discord maximum)
+MEMBER_PAGE_SIZE = 1000
+
+# Heading of the error message shown for a failed task
+TASK_ERROR_TITLES = {
+    'create_channel': 'Error creating campaign',
+    'complete': 'Error creating campaign',
+    'sync_campaign': 'Error syncing campaign',
+    'add_members': 'Error adding campaign members'
+}
 
 
 def edit_original_response(application_id, interaction_token, content):
     """
     Edit the original deferred interaction response
+    Skipped for replayed tasks whose interaction token has expired
     """
-    url = f"https://discord.com/api/v10/webhooks/{application_id}/{interaction_token}/messages/@original"
-    headers = {
-        "Content-Type": "application/json"
-    }
+    if not application_id or not interaction_token:
+        print(f"No interaction token, skipping response edit")
+        return None
+    
     payload = {
         "content": content
     }
     
     try:
-        response = requests.patch(url, json=payload, headers=headers)
-        response.raise_for_status()
+        # Goes through the shared rate limiter (webhook edits are limited per token)
+        response = discord_request(
+            'PATCH', f"/webhooks/{application_id}/{interaction_token}/messages/@original", None, payload
+        )
         print(f"Successfully edited original response")
-        return response.json()
+        return response
     except requests.exceptions.RequestException as e:
         print(f"Error editing original response: {e}")
         if hasattr(e, 'response') and e.response is not None:
             print(f"Response: {e.response.text}")
 
 
+def edit_final_response(application_id, interaction_token, content):
+    """
+    Edit the original response with a task's final message (traced as final_edit)
+    """
+    with span('final_edit'):
+        return edit_original_response(application_id, interaction_token, content)
+
+
 def create_progress_bar(current, total, width=20):
     """
     Create a text-based progress bar
@@ -45,12 +85,6 @@ def create_channel(guild_id, channel_config, category_id, campaign_role_id, bot_
     """
     Create a channel with appropriate permissions
     """
-    url = f"https://discord.com/api/v10/guilds/{guild_id}/channels"
-    headers = {
-        "Authorization": f"Bot {bot_token}",
-        "Content-Type": "application/json"
-    }
-    
     # All channels inherit category permissions
     permission_overwrites = []
     
@@ -62,17 +96,12 @@ def create_channel(guild_id, channel_config, category_id, campaign_role_id, bot_
     }
     
     # Add topic/description for text and forum channels
-    if channel_config['type'] in [0, 15] and channel_config.get('description'):
-        description = channel_config['description']
-        # Add GM-only note to description
-        if channel_config.get('gm_only'):
-            description = f"🔒 GM ONLY - {description}\n\n⚠️ Admins: Please manually restrict this channel to GMs only."
-        payload['topic'] = description
+    topic = get_channel_topic(channel_config)
+    if topic:
+        payload['topic'] = topic
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return discord_request('POST', f"/guilds/{guild_id}/channels", bot_token, payload)
     except requests.exceptions.RequestException as e:
         print(f"Error creating channel {channel_config['name']}: {e}")
         if hasattr(e, 'response') and e.response is not None:
@@ -80,20 +109,219 @@ def create_channel(guild_id, channel_config, category_id, campaign_role_id, bot_
         raise
 
 
+def sync_campaigns(guild_id, campaign_name, bot_token, template=None):
+    """
+    Bring existing campaigns in line with the channel template
+    Only issues the create, patch and reorder calls the diff requires
+    Parallel calls are spread across the guild's bot token pool
+    Returns a list of per-campaign results
+    """
+    template = template or DEFAULT_CAMPAIGN_CHANNELS
+    all_channels = get_guild_channels(guild_id, bot_token)
+    roles = discord_request('GET', f"/guilds/{guild_id}/roles", bot_token)
+    campaigns = find_campaigns(all_channels, roles, campaign_name)
+    
+    results = []
+    tasks = []
+    for category, role in campaigns:
+        diff = diff_campaign(template, category, all_channels)
+        result = {
+            'campaign_name': category['name'],
+            'category': category,
+            'diff': diff,
+            'created': [],
+            'updated': [],
+            'errors': []
+        }
+        results.append(result)
+        
+        for channel_config in diff['create']:
+            call = lambda cfg=channel_config, cat=category, r=role: create_channel(
+                guild_id, cfg, cat['id'], r['id'], get_bot_token(guild_id)
+            )
+            tasks.append((result, 'created', channel_config['name'], call))
+        for update in diff['update']:
+            call = lambda u=update: discord_request(
+                'PATCH', f"/channels/{u['id']}", get_bot_token(guild_id), u['changes']
+            )
+            tasks.append((result, 'updated', update['name'], call))
+    
+    print(f"Syncing {len(campaigns)} campaign(s) with {len(tasks)} channel call(s)")
+    outcomes = run_concurrently([task[3] for task in tasks])
+    
+    channels_by_id = {ch['id']: ch for ch in all_channels}
+    for (result, action, name, _), (channel, error) in zip(tasks, outcomes):
+        if error:
+            result['errors'].append(f"{name}: {error}")
+            continue
+        channels_by_id[channel['id']] = {**channels_by_id.get(channel['id'], {}), **channel}
+        result[action].append(name)
+    
+    # One bulk position update covers every campaign that needs reordering
+    merged_channels = list(channels_by_id.values())
+    position_updates = []
+    for result in results:
+        if result['diff']['reorder']:
+            position_updates.extend(build_position_updates(template, result['category'], merged_channels))
+    
+    if position_updates:
+        print(f"Reordering {len(position_updates)} channel(s)")
+        try:
+            discord_request('PATCH', f"/guilds/{guild_id}/channels", bot_token, position_updates)
+        except requests.exceptions.RequestException as e:
+            print(f"Error reordering channels: {e}")
+            for result in results:
+                if result['diff']['reorder']:
+                    result['errors'].append(f"reorder: {e}")
+    
+    return results
+
+
+def build_sync_summary(campaign_name, results):
+    """
+    Build the final sync message from per-campaign results
+    """
+    if not results:
+        target = f"**{campaign_name}**" if campaign_name else "any campaigns"
+        return f"❌ **Sync failed**\n\nCould not find {target} (a category with a matching Members role)."
+    
+    unchanged = [r['campaign_name'] for r in results if is_empty_diff(r['diff'])]
+    summary = f"🔄 **Campaign Sync Complete** ({len(results)} campaign(s))\n\n"
+    
+    for result in results:
+        if is_empty_diff(result['diff']) and not result['diff']['mismatched']:
+            continue
+        summary += f"**{result['campaign_name']}**\n"
+        if result['created']:
+            summary += f"  ➕ Created: {', '.join(result['created'])}\n"
+        if result['updated']:
+            summary += f"  ✏️ Updated: {', '.join(result['updated'])}\n"
+        if result['diff']['reorder'] and not any(e.startswith('reorder') for e in result['errors']):
+            summary += "  ↕️ Reordered channels\n"
+        if result['diff']['mismatched']:
+            summary += f"  ⚠️ Type differs from template: {', '.join(result['diff']['mismatched'])}\n"
+        for error in result['errors']:
+            summary += f"  ❌ {error}\n"
+    
+    if unchanged:
+        summary += f"\n✅ Already up to date: {', '.join(unchanged)}"
+    return summary
+
+
+def list_guild_members(guild_id, bot_token):
+    """
+    List all guild members (requires the Server Members privileged intent)
+    """
+    members = []
+    after = '0'
+    while True:
+        page = discord_request(
+            'GET', f"/guilds/{guild_id}/members?limit={MEMBER_PAGE_SIZE}&after={after}", bot_token
+        )
+        members.extend(page)
+        if len(page) < MEMBER_PAGE_SIZE:
+            return members
+        after = page[-1]['user']['id']
+
+
+def add_campaign_members(guild_id, campaign_name, user_ids, source_role_id, bot_token, on_progress=None):
+    """
+    Give the campaign role to a list of users and/or every member of another role
+    Role assignments run in parallel across the guild's bot token pool;
+    on_progress(done, total) is called per chunk
+    Returns a dict with the added, skipped and failed user IDs
+    """
+    role_name = f"{campaign_name} Members"
+    roles = discord_request('GET', f"/guilds/{guild_id}/roles", bot_token)
+    role = next((r for r in roles if r.get('name') == role_name), None)
+    if not role:
+        raise ValueError(f"Role '{role_name}' not found")
+    
+    user_ids = list(user_ids or [])
+    skipped = []
+    if source_role_id:
+        members = list_guild_members(guild_id, bot_token)
+        for member in members:
+            member_roles = member.get('roles', [])
+            if source_role_id not in member_roles:
+                continue
+            user_id = member['user']['id']
+            if role['id'] in member_roles:
+                skipped.append(user_id)
+            elif user_id not in user_ids:
+                user_ids.append(user_id)
+        print(f"Copying {len(user_ids)} member(s) from role {source_role_id} ({len(skipped)} already assigned)")
+    
+    result = {'role_name': role_name, 'added': [], 'skipped': skipped, 'failed': []}
+    total = len(user_ids)
+    for start in range(0, total, MEMBER_PROGRESS_CHUNK):
+        chunk = user_ids[start:start + MEMBER_PROGRESS_CHUNK]
+        outcomes = run_concurrently([
+            lambda user_id=user_id: discord_request(
+                'PUT', f"/guilds/{guild_id}/members/{user_id}/roles/{role['id']}", get_bot_token(guild_id)
+            )
+            for user_id in chunk
+        ])
+        for user_id, (_, error) in zip(chunk, outcomes):
+            if error:
+                print(f"Error adding member {user_id}: {error}")
+                result['failed'].append(user_id)
+            else:
+                result['added'].append(user_id)
+        if on_progress:
+            on_progress(start + len(chunk), total)
+    
+    return result
+
+
+def build_members_summary(campaign_name, result):
+    """
+    Build the final member assignment message
+    """
+    summary = f"✅ **Members Added: {campaign_name}**\n\n"
+    summary += f"**Role:** {result['role_name']}\n"
+    summary += f"**Added {len(result['added'])} member(s):** "
+    summary += ' '.join(f"<@{user_id}>" for user_id in result['added']) or '_none_'
+    summary += "\n"
+    if result['skipped']:
+        summary += f"\nℹ️ {len(result['skipped'])} member(s) already had the role\n"
+    if result['failed']:
+        summary += f"\n⚠️ Failed to add: {' '.join(f'<@{user_id}>' for user_id in result['failed'])}\n"
+    return summary
+
+
+@profiled('worker')
 def lambda_handler(event, context):
     """
     Process SQS messages to create channels
+    Failed records are reported back to SQS so they are retried and then
+    moved to the dead-letter queue
     """
-    bot_token = os.environ.get('DISCORD_BOT_TOKEN')
-    
+    batch_item_failures = []
     for record in event['Records']:
+        message = {}
+        task_started = time.time()
         try:
             # Parse message
             message = json.loads(record['body'])
+            bot_token = get_bot_token(message.get('guild_id'))
+            
+            # Continue the trace started by the interaction
+            set_trace(
+                message.get('trace_id'),
+                campaign_name=message.get('campaign_name'),
+                guild_id=message.get('guild_id')
+            )
+            sent_timestamp = record.get('attributes', {}).get('SentTimestamp')
+            if sent_timestamp:
+                record_span(
+                    'queue_wait', int(sent_timestamp) / 1000, task_started,
+                    task_type=message.get('task_type')
+                )
             
             task_type = message['task_type']
-            application_id = message['application_id']
-            interaction_token = message['interaction_token']
+            application_id = message.get('application_id')
+            interaction_token = message.get('interaction_token')
             
             print(f"Processing task: {task_type}")
             
@@ -130,6 +358,46 @@ def lambda_handler(event, context):
                 
                 edit_original_response(application_id, interaction_token, status_message)
                 
+            elif task_type == 'sync_campaign':
+                guild_id = message['guild_id']
+                campaign_name = message.get('campaign_name')
+                
+                print(f"Syncing campaign(s): {campaign_name or 'all'}")
+                results = sync_campaigns(guild_id, campaign_name, bot_token)
+                edit_final_response(
+                    application_id,
+                    interaction_token,
+                    build_sync_summary(campaign_name, results)
+                )
+                print(f"Campaign sync complete!")
+                
+            elif task_type == 'add_members':
+                guild_id = message['guild_id']
+                campaign_name = message['campaign_name']
+                
+                def report_progress(done, total):
+                    progress_bar = create_progress_bar(done, total)
+                    edit_original_response(
+                        application_id,
+                        interaction_token,
+                        f"👥 **Adding Members: {campaign_name}**\n\n{progress_bar}"
+                    )
+                
+                result = add_campaign_members(
+                    guild_id=guild_id,
+                    campaign_name=campaign_name,
+                    user_ids=message.get('user_ids', []),
+                    source_role_id=message.get('source_role_id'),
+                    bot_token=bot_token,
+                    on_progress=report_progress
+                )
+                edit_final_response(
+                    application_id,
+                    interaction_token,
+                    build_members_summary(campaign_name, result)
+                )
+                print(f"Member assignment complete!")
+                
             elif task_type == 'complete':
                 # Final completion message
                 campaign_name = message['campaign_name']
@@ -168,17 +436,19 @@ def lambda_handler(event, context):
                         gm_tag = " 🔒" if ch.get('gm_only') else ""
                         channel_summary += f"  • {ch['name']}{gm_tag}\n"
                 
-                edit_original_response(application_id, interaction_token, channel_summary)
+                edit_final_response(application_id, interaction_token, channel_summary)
                 print(f"Campaign creation complete!")
                 
         except Exception as e:
             print(f"Error processing message: {e}")
             import traceback
             print(f"Traceback: {traceback.format_exc()}")
+            batch_item_failures.append({'itemIdentifier': record.get('messageId')})
             
             # Try to send error message
             try:
-                error_message = f"❌ **Error creating campaign**\n\nError: {str(e)}"
+                title = TASK_ERROR_TITLES.get(message.get('task_type'), 'Error processing task')
+                error_message = f"❌ **{title}**\n\nError: {str(e)}"
                 edit_original_response(
                     message.get('application_id'),
                     message.get('interaction_token'),
@@ -186,8 +456,9 @@ def lambda_handler(event, context):
                 )
             except:
                 print("Failed to send error message to Discord")
+        finally:
+            record_span('task', task_started, time.time(), task_type=message.get('task_type'))
     
     return {
-        'statusCode': 200,
-        'body': json.dumps('Processing complete')
+        'batchItemFailures': batch_item_failures
     }